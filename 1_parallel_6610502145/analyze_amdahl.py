@@ -6,17 +6,24 @@ Amdahl's Law Analysis Tool
 และสรุปข้อมูลสำหรับรายงาน
 
 ใช้:
-    python3 analyze_amdahl.py benchmark_results_YYYYMMDD_HHMMSS.csv [--advanced]
+    python3 analyze_amdahl.py benchmark_results_YYYYMMDD_HHMMSS.csv [--advanced] [--models] [--json OUT.json]
 
 ตัวเลือก:
     --advanced   ใช้ nonlinear least-squares fitting หา p* ที่ดีที่สุด
+    --models     ฟิต Amdahl เทียบกับ Universal Scalability Law (σ, κ), คำนวณ Karp–Flatt
+                 แล้วทำนายจำนวน processes ที่ให้ throughput สูงสุด พร้อม confidence interval
+    --json PATH  บันทึกผลของ --models เป็น JSON (เปิด --models ให้อัตโนมัติ)
 """
 
+import json
 import pandas as pd
 import numpy as np
 from pathlib import Path
 import sys
 
+BOOTSTRAP_RESAMPLES = 1000
+CONFIDENCE = 0.95
+
 
 def analyze_amdahl_basic(csv_file):
     """
@@ -179,6 +186,162 @@ def analyze_amdahl_advanced(csv_file):
         return None
 
 
+def amdahl_speedup(N, p):
+    """Amdahl: S(N) = 1 / ((1-p) + p/N)"""
+    return 1.0 / ((1 - p) + p / N)
+
+
+def usl_speedup(N, sigma, kappa):
+    """Universal Scalability Law: S(N) = N / (1 + σ(N-1) + κN(N-1))"""
+    return N / (1 + sigma * (N - 1) + kappa * N * (N - 1))
+
+
+def karp_flatt(N, S):
+    """serial fraction ที่วัดได้จริง e = (1/S - 1/N) / (1 - 1/N) ต่อ N (N > 1)"""
+    N = np.asarray(N, dtype=float)
+    S = np.asarray(S, dtype=float)
+    return (1 / S - 1 / N) / (1 - 1 / N)
+
+
+def usl_optimal_n(sigma, kappa, n_cap):
+    """
+    จำนวน processes (จำนวนเต็ม) ที่ S(N) ของ USL สูงสุด
+
+    จุดยอดต่อเนื่องคือ N* = sqrt((1-σ)/κ); ถ้า κ = 0 กราฟไม่มีจุดยอด จึงตัดที่ n_cap
+    """
+    if kappa <= 0:
+        return n_cap
+    peak = np.sqrt(max(1 - sigma, 0) / kappa)
+    candidates = {max(1, int(np.floor(peak))), max(1, int(np.ceil(peak)))}
+    best = max(candidates, key=lambda n: usl_speedup(n, sigma, kappa))
+    return min(best, n_cap)
+
+
+def fit_stats(S_observed, S_predicted, k):
+    """R² และ AIC (least squares: n·ln(RSS/n) + 2k) ของโมเดลที่มี k พารามิเตอร์"""
+    n = len(S_observed)
+    rss = float(np.sum((S_observed - S_predicted) ** 2))
+    tss = float(np.sum((S_observed - S_observed.mean()) ** 2))
+    r_squared = 1 - rss / tss if tss > 0 else float("nan")
+    aic = n * np.log(max(rss, 1e-300) / n) + 2 * k
+    return {"r_squared": r_squared, "aic": float(aic), "rmse": float(np.sqrt(rss / n))}
+
+
+def fit_models(N, S):
+    """ฟิต Amdahl (p) และ USL (σ, κ) กับจุด (N, S) ทั้งหมด รวม N = 1"""
+    import warnings
+
+    from scipy.optimize import OptimizeWarning, curve_fit
+
+    # จุดน้อย (เช่น N = 1, 2) ฟิตได้พอดีจน covariance หาไม่ได้ ซึ่งไม่กระทบค่าพารามิเตอร์
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", OptimizeWarning)
+        (p,), _ = curve_fit(amdahl_speedup, N, S, p0=[0.5], bounds=(0, 1), maxfev=5000)
+        (sigma, kappa), _ = curve_fit(
+            usl_speedup, N, S, p0=[0.1, 0.01], bounds=([0, 0], [1, np.inf]), maxfev=5000
+        )
+    return p, sigma, kappa
+
+
+def analyze_scalability_models(csv_file):
+    """
+    เปรียบเทียบ Amdahl กับ USL ด้วย AIC/R², คำนวณ Karp–Flatt ต่อ N และทำนาย N
+    ที่ throughput สูงสุด (USL) พร้อม CI จากการ bootstrap residuals แล้วฟิตใหม่
+
+    USL อธิบายกรณีที่ speedup ลดลงเมื่อเพิ่ม N ได้ (κ > 0) ซึ่ง Amdahl ทำไม่ได้
+    """
+    try:
+        from scipy.optimize import curve_fit  # noqa: F401
+    except ImportError:
+        print("❌ scipy ยังไม่ได้ติดตั้ง ให้ติดตั้ง: pip install scipy")
+        return None
+
+    print("\n" + "=" * 70)
+    print("SCALABILITY MODELS - AMDAHL vs USL + KARP-FLATT")
+    print("=" * 70)
+
+    df = pd.read_csv(csv_file)
+    N = df["num_processes"].to_numpy().astype(float)
+    S = df["speedup"].to_numpy().astype(float)
+    n_cap = int(N.max()) * 4
+
+    try:
+        p, sigma, kappa = fit_models(N, S)
+    except Exception as e:
+        print(f"❌ Fitting failed: {e}")
+        return None
+
+    S_amdahl = amdahl_speedup(N, p)
+    S_usl = usl_speedup(N, sigma, kappa)
+    models = {
+        "amdahl": {"p": float(p), **fit_stats(S, S_amdahl, 1)},
+        "usl": {"sigma": float(sigma), "kappa": float(kappa), **fit_stats(S, S_usl, 2)},
+    }
+    best_model = min(models, key=lambda name: models[name]["aic"])
+
+    # bootstrap: สุ่ม residual ของ USL กลับเข้าไปในค่าที่ทำนาย แล้วฟิตใหม่
+    rng = np.random.default_rng(0)
+    residuals = S - S_usl
+    optima = []
+    for _ in range(BOOTSTRAP_RESAMPLES):
+        S_boot = S_usl + rng.choice(residuals, size=residuals.size, replace=True)
+        try:
+            _, s_b, k_b = fit_models(N, S_boot)
+        except Exception:
+            continue
+        optima.append(usl_optimal_n(s_b, k_b, n_cap))
+    n_opt = usl_optimal_n(sigma, kappa, n_cap)
+    tail = (1 - CONFIDENCE) / 2 * 100
+    ci = (
+        [int(v) for v in np.percentile(optima, [tail, 100 - tail])]
+        if optima
+        else [n_opt, n_opt]
+    )
+
+    mask = N > 1
+    kf = karp_flatt(N[mask], S[mask])
+
+    print(f"\n🎯 Amdahl: p = {p:.4f}   R² = {models['amdahl']['r_squared']:.4f}   AIC = {models['amdahl']['aic']:.2f}")
+    print(
+        f"🎯 USL:    σ = {sigma:.4f}  κ = {kappa:.6f}   R² = {models['usl']['r_squared']:.4f}   "
+        f"AIC = {models['usl']['aic']:.2f}"
+    )
+    print(f"\n🏆 โมเดลที่อธิบายข้อมูลได้ดีกว่า (AIC ต่ำกว่า): {best_model.upper()}")
+
+    print(f"\n📈 Karp–Flatt serial fraction ต่อ N:")
+    print(
+        pd.DataFrame({"num_processes": N[mask].astype(int), "speedup": S[mask], "karp_flatt_e": kf})
+        .to_string(index=False)
+    )
+    if kf.size > 1 and kf[-1] > kf[0]:
+        print("   e เพิ่มขึ้นตาม N → overhead จากการสื่อสาร/ซิงค์โตตาม N (ไม่ใช่ serial fraction คงที่)")
+
+    cap_note = " (κ = 0: ไม่มีจุดยอด ตัดที่ 4 เท่าของ N สูงสุดที่วัด)" if kappa <= 0 else ""
+    print(
+        f"\n⚡ N ที่ throughput สูงสุด (USL): {n_opt}  "
+        f"[{CONFIDENCE:.0%} CI {ci[0]}-{ci[1]}]  S ≈ {usl_speedup(n_opt, sigma, kappa):.2f}x{cap_note}"
+    )
+
+    return {
+        "csv": str(csv_file),
+        "models": models,
+        "best_model": best_model,
+        "karp_flatt": [
+            {"num_processes": int(n), "serial_fraction": float(e)} for n, e in zip(N[mask], kf)
+        ],
+        "optimal_processes": int(n_opt),
+        "optimal_processes_ci": ci,
+        "confidence": CONFIDENCE,
+        "predicted_speedup": float(usl_speedup(n_opt, sigma, kappa)),
+    }
+
+
+def load_prediction(json_file):
+    """อ่านผล --json (ใช้จากเครื่องมืออื่น เช่น autotuner)"""
+    with open(json_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
 def generate_summary(basic_result, advanced_result=None):
     """
     สรุปผลสำหรับรายงาน (summary for report)
@@ -268,10 +431,21 @@ def main():
         print(
             "  python3 analyze_amdahl.py benchmark_results_20251029_143212.csv --advanced"
         )
+        print(
+            "  python3 analyze_amdahl.py benchmark_results_20251029_143212.csv --json prediction.json"
+        )
         sys.exit(1)
 
     csv_file = sys.argv[1]
     advanced_mode = "--advanced" in sys.argv
+    json_file = None
+    if "--json" in sys.argv:
+        index = sys.argv.index("--json")
+        if index + 1 >= len(sys.argv):
+            print("❌ --json ต้องระบุชื่อไฟล์")
+            sys.exit(1)
+        json_file = sys.argv[index + 1]
+    models_mode = "--models" in sys.argv or json_file is not None
 
     if not Path(csv_file).exists():
         print(f"❌ ไฟล์ {csv_file} ไม่พบ")
@@ -288,6 +462,16 @@ def main():
     # สรุปสำหรับรายงาน
     generate_summary(basic_result, advanced_result)
 
+    # เปรียบเทียบโมเดล Amdahl / USL และทำนาย N ที่ดีที่สุด (ถ้าขอ)
+    if models_mode:
+        models_result = analyze_scalability_models(csv_file)
+        if models_result is None:
+            sys.exit(1)
+        if json_file:
+            with open(json_file, "w", encoding="utf-8") as f:
+                json.dump(models_result, f, indent=2)
+            print(f"\n✓ บันทึกผลเป็น JSON ที่ {json_file}")
+
     print("\n" + "=" * 70)
 
 
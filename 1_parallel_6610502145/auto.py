@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Autotuner: choose algorithm, backend and worker count for one number.
+
+    python3 auto.py 36028797018963968            # decide, run, log the outcome
+    python3 auto.py 36028797018963968 --dry-run  # only show the ranking
+    python3 auto.py calibrate                    # short microbenchmark suite on this host
+
+Cost model, per candidate (algorithm a, backend b, workers w):
+
+    T = launch_b + per_worker_b * w + unit_a * work_a(n) / S_a(w)
+
+work_a(n) comes from cheap features of n: after dividing out the primes below
+1000, trial division still scans sqrt(n) candidates and rho takes about
+cofactor^(1/4) steps (~1 when the cofactor is 1 or prime). The divisor path
+(divisors.factorize) tests 2 and then odd candidates up to
+min(sqrt(cofactor), divisors.TRIAL_BOUND) and hands a composite remainder to
+rho, counted at RHO_STEP_CANDIDATES candidates per step. Equal predictions go
+to fewer workers, then to the order of ALGORITHMS and BACKENDS. S_a(w) is a
+USL speedup curve: trial division uses the sigma/kappa of an
+`analyze_amdahl.py --json` prediction when given; rho races independent walks
+(modest speedup), and so does the divisor path once its trial part is done. The remaining coefficients are a least-squares fit, in relative error
+and pulled towards built-in defaults, over every stored observation for this
+host: benchmark.py history rows, calibration runs and earlier auto runs.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from math import isqrt
+
+import numpy as np
+
+import backends
+import divisors
+import history
+import rho
+
+DEFAULT_DB = "auto_model.sqlite"
+# also the tie-break order: rho before divisors when both predict the same time
+ALGORITHMS = ["trial", "rho", "divisors"]
+BACKENDS = backends.BACKENDS
+FEATURE_PRIMES = [p for p in range(2, 1000) if all(p % q for q in range(2, isqrt(p) + 1))]
+
+# starting point before any observation: seconds, and seconds per unit of work
+DEFAULTS = {
+    ("launch", "mpi"): 0.45,
+    ("per_worker", "mpi"): 0.3,
+    ("launch", "process"): 0.3,
+    ("per_worker", "process"): 0.05,
+    ("launch", "thread"): 0.25,
+    ("per_worker", "thread"): 0.005,
+    ("unit", "trial"): 7e-8,
+    ("unit", "rho"): 2e-5,
+    ("unit", "divisors"): 2e-7,
+}
+# USL (sigma, kappa) per algorithm; divisors splits its cofactor with the same rho race
+SPEEDUP = {"trial": (0.05, 0.0), "rho": (0.7, 0.0), "divisors": (0.7, 0.0)}
+# one rho step in divisor-path work units (trial candidates), by the default unit costs
+RHO_STEP_CANDIDATES = DEFAULTS[("unit", "rho")] / DEFAULTS[("unit", "divisors")]
+# how strongly the defaults hold against the data (pseudo-observations per parameter)
+PRIOR_WEIGHT = 0.3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY,
+    recorded_at TEXT NOT NULL,
+    host TEXT NOT NULL,
+    source TEXT NOT NULL,
+    number TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    workers INTEGER NOT NULL,
+    predicted_seconds REAL,
+    measured_seconds REAL
+);
+"""
+
+
+def trial_candidates(bound):
+    """Candidates divisors.strip_small_factors tests below `bound`: 2, then the odd numbers"""
+    return 1 + max(0, bound - 2) // 2
+
+
+def features(number):
+    """work units per algorithm for `number` (see module docstring)"""
+    cofactor = number
+    for p in FEATURE_PRIMES:
+        while cofactor % p == 0 and cofactor > 1:
+            cofactor //= p
+    easy = cofactor == 1 or rho.is_prime(cofactor)
+    rho_steps = 1.0 if easy else float(cofactor) ** 0.25
+    # the scan stops at sqrt of what is left or at TRIAL_BOUND; only a composite goes on to rho
+    scan = trial_candidates(min(isqrt(cofactor) + 1, divisors.TRIAL_BOUND))
+    return {
+        "trial": float(isqrt(number)),
+        "divisors": float(scan) + (0.0 if easy else RHO_STEP_CANDIDATES * rho_steps),
+        "rho": rho_steps,
+    }
+
+
+def usl(workers, sigma, kappa):
+    return workers / (1 + sigma * (workers - 1) + kappa * workers * (workers - 1))
+
+
+def available_backends():
+    """mpi only when mpirun is on PATH; the pools always work"""
+    return [b for b in BACKENDS if b != "mpi" or shutil.which("mpirun")]
+
+
+class CostModel:
+    def __init__(self, observations, prediction=None):
+        self.speedup = dict(SPEEDUP)
+        if prediction is not None:
+            usl_fit = prediction["models"]["usl"]
+            self.speedup["trial"] = (usl_fit["sigma"], usl_fit["kappa"])
+        self.params = dict(DEFAULTS)
+        self.fitted_from = 0
+        self.fit(observations)
+
+    def row(self, work, algorithm, backend, workers):
+        """Design-matrix row: the prediction is row · params"""
+        row = dict.fromkeys(DEFAULTS, 0.0)
+        row[("launch", backend)] = 1.0
+        row[("per_worker", backend)] = float(workers)
+        row[("unit", algorithm)] = work[algorithm] / usl(workers, *self.speedup[algorithm])
+        return row
+
+    def fit(self, observations):
+        keys = list(DEFAULTS)
+        rows, targets = [], []
+        for obs in observations:
+            if obs["algorithm"] not in ALGORITHMS or obs["backend"] not in BACKENDS:
+                continue
+            row = self.row(features(obs["number"]), obs["algorithm"], obs["backend"], obs["workers"])
+            # relative error: a 10 ms run counts as much as a 10 s one
+            rows.append([row[k] / obs["seconds"] for k in keys])
+            targets.append(1.0)
+        self.fitted_from = len(rows)
+        if not rows:
+            return
+
+        for i, key in enumerate(keys):
+            prior = [0.0] * len(keys)
+            prior[i] = PRIOR_WEIGHT / DEFAULTS[key]
+            rows.append(prior)
+            targets.append(PRIOR_WEIGHT)
+        solution, *_ = np.linalg.lstsq(np.array(rows), np.array(targets), rcond=None)
+        for key, value in zip(keys, solution):
+            # a negative coefficient means the data cannot pin it down; keep the default
+            self.params[key] = float(value) if value > 0 else DEFAULTS[key]
+
+    def predict(self, work, algorithm, backend, workers):
+        row = self.row(work, algorithm, backend, workers)
+        return sum(row[k] * self.params[k] for k in row)
+
+    def rank(self, number, max_workers, backends=None):
+        """Every candidate as (predicted seconds, algorithm, backend, workers), best first"""
+        work = features(number)
+        candidates = []
+        for algorithm in ALGORITHMS:
+            for backend in backends or available_backends():
+                for workers in range(1, max_workers + 1):
+                    seconds = self.predict(work, algorithm, backend, workers)
+                    candidates.append((seconds, algorithm, backend, workers))
+        # ties: fewer workers, then ALGORITHMS / BACKENDS order (not alphabetical)
+        return sorted(
+            candidates,
+            key=lambda c: (c[0], c[3], ALGORITHMS.index(c[1]), BACKENDS.index(c[2])),
+        )
+
+
+def connect(path):
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def load_observations(db_path, history_path):
+    """Timed runs on this host: auto/calibration log plus benchmark.py history"""
+    host = history.host_fingerprint()
+    observations = []
+    with connect(db_path) as db:
+        for number, algorithm, backend, workers, seconds in db.execute(
+            "SELECT number, algorithm, backend, workers, measured_seconds FROM observations "
+            "WHERE host = ? AND measured_seconds > 0",
+            (host,),
+        ):
+            observations.append(
+                {
+                    "number": int(number),
+                    "algorithm": algorithm,
+                    "backend": backend,
+                    "workers": workers,
+                    "seconds": seconds,
+                }
+            )
+
+    if os.path.exists(history_path):
+        for row in history.load(history_path, host=host):
+            # trial division is recorded as "<kernel>_<schedule>"; auto only runs the vectorized kernel
+            if row["method"].startswith("vectorized_"):
+                algorithm = "trial"
+            elif row["method"] in ("rho", "divisors"):
+                algorithm = row["method"]
+            else:
+                continue
+            observations.append(
+                {
+                    "number": int(row["number"]),
+                    "algorithm": algorithm,
+                    "backend": row["backend"],
+                    "workers": row["num_processes"],
+                    "seconds": row["metrics"]["time_seconds"],
+                }
+            )
+    return [obs for obs in observations if obs["seconds"] > 0]
+
+
+def log_observation(db_path, source, number, algorithm, backend, workers, predicted, measured):
+    with connect(db_path) as db:
+        db.execute(
+            "INSERT INTO observations (recorded_at, host, source, number, algorithm, backend, "
+            "workers, predicted_seconds, measured_seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                datetime.now().isoformat(timespec="seconds"),
+                history.host_fingerprint(),
+                source,
+                str(number),
+                algorithm,
+                backend,
+                workers,
+                predicted,
+                measured,
+            ),
+        )
+
+
+def command_for(number, algorithm, backend, workers):
+    """parallel.py launch for one choice; trial division always uses the vectorized kernel"""
+    extra = ["--algorithm", algorithm]
+    if algorithm == "trial":
+        extra += ["--kernel", "vectorized"]
+    if backend == "mpi":
+        launch = ["mpirun", "-n", str(workers)]
+        # only Open MPI needs (and accepts) this; MPICH oversubscribes on its own
+        if workers > (os.cpu_count() or 1) and backends.mpi_launcher() == "openmpi":
+            launch.append("--oversubscribe")
+        return [*launch, "python3", "parallel.py", str(number), *extra]
+    return [
+        "python3",
+        "parallel.py",
+        str(number),
+        "--backend",
+        backend,
+        "--workers",
+        str(workers),
+        *extra,
+    ]
+
+
+def timed(command, quiet=False):
+    """(wall-clock seconds, stdout) of one launch"""
+    start = time.perf_counter()
+    completed = subprocess.run(command, check=True, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if not quiet:
+        print(completed.stdout, end="")
+    return elapsed, completed.stdout
+
+
+def calibrate(db_path, max_workers, backends):
+    """
+    Short microbenchmark suite: launch cost (tiny input) and each algorithm's
+    unit cost, at 1 and max_workers workers on every backend.
+    """
+    suite = [
+        (1_000_003, "divisors"),  # prime: the run is almost all launch overhead
+        (2**38, "trial"),
+        (2**44, "trial"),
+        (16777213 * 16777199, "rho"),  # two 24-bit primes
+        (1000003 * 1000033, "divisors"),  # sqrt(cofactor) ~ 1e6 divisions
+    ]
+    counts = sorted({1, max_workers})
+    total = len(suite) * len(backends) * len(counts)
+    done = 0
+    for number, algorithm in suite:
+        for backend in backends:
+            for workers in counts:
+                seconds, _ = timed(
+                    command_for(number, algorithm, backend, workers) + ["--no-cache"], quiet=True
+                )
+                log_observation(db_path, "calibrate", number, algorithm, backend, workers, None, seconds)
+                done += 1
+                print(
+                    f"[{done}/{total}] {algorithm:<9} {backend:<8} workers={workers:<3} "
+                    f"n={number:<22} {seconds:.3f}s"
+                )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Pick algorithm, backend and worker count for a number from a calibrated cost model."
+    )
+    parser.add_argument(
+        "target",
+        help="Integer to factor, or 'calibrate' to run the microbenchmark suite on this host.",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Largest worker/rank count considered (default: CPU count).",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        action="append",
+        help="Only consider this backend (repeatable; default: every available one).",
+    )
+    parser.add_argument(
+        "--prediction",
+        help="analyze_amdahl.py --json output; its USL fit shapes the trial-division speedup.",
+    )
+    parser.add_argument(
+        "--db", default=DEFAULT_DB, help=f"Decision/calibration log (default: {DEFAULT_DB})."
+    )
+    parser.add_argument(
+        "--history",
+        default=history.DEFAULT_PATH,
+        help=f"benchmark.py history store used as extra observations (default: {history.DEFAULT_PATH}).",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print the decision without running it."
+    )
+    parser.add_argument(
+        "--top", type=int, default=5, help="Candidates shown in the ranking (default: 5)."
+    )
+    args = parser.parse_args()
+    if args.max_workers < 1:
+        parser.error("--max-workers must be at least 1")
+    if args.target != "calibrate":
+        try:
+            args.number = int(args.target)
+        except ValueError:
+            parser.error("target must be an integer or 'calibrate'")
+    return args
+
+
+def main():
+    args = parse_args()
+    backends = args.backend or available_backends()
+
+    if args.target == "calibrate":
+        calibrate(args.db, args.max_workers, backends)
+        print(f"\n✓ Calibration stored in {args.db}")
+        return
+
+    prediction = None
+    if args.prediction:
+        with open(args.prediction, encoding="utf-8") as f:
+            prediction = json.load(f)
+    model = CostModel(load_observations(args.db, args.history), prediction)
+    ranking = model.rank(args.number, args.max_workers, backends)
+
+    print(f"Cost model fitted from {model.fitted_from} observation(s); best candidates:")
+    for seconds, algorithm, backend, workers in ranking[: args.top]:
+        print(f"  {seconds:10.3f}s  {algorithm:<9} {backend:<8} workers={workers}")
+    predicted, algorithm, backend, workers = ranking[0]
+    print(f"→ {algorithm} on {backend} with {workers} worker(s), predicted {predicted:.3f}s\n")
+
+    if args.dry_run:
+        return
+
+    try:
+        seconds, output = timed(command_for(args.number, algorithm, backend, workers))
+    except subprocess.CalledProcessError as e:
+        print(e.stdout or "", end="")
+        print(e.stderr or "", end="", file=sys.stderr)
+        sys.exit(e.returncode)
+
+    # a cache hit says nothing about the chosen configuration's cost
+    measured = None if "(from cache)" in output else seconds
+    log_observation(args.db, "auto", args.number, algorithm, backend, workers, predicted, measured)
+    note = "" if measured is not None else " (cache hit, not used for fitting)"
+    print(f"\nMeasured {seconds:.3f}s (predicted {predicted:.3f}s), logged to {args.db}{note}")
+
+
+if __name__ == "__main__":
+    main()
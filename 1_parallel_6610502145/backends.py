@@ -0,0 +1,172 @@
+"""
+Single-node execution backends for the trial-division range scan.
+
+mpi      the MPI ranks in parallel.solve (needs mpirun and mpi4py)
+process  ProcessPoolExecutor; every task writes its hits into its own row of
+         one shared RawArray instead of pickling them back
+thread   ThreadPoolExecutor; worthwhile for the vectorized kernel, whose NumPy
+         ufuncs release the GIL, and on free-threaded (3.13t) builds
+"""
+
+import functools
+import multiprocessing
+import subprocess
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+import numpy as np
+
+BACKENDS = ["mpi", "process", "thread"]
+
+# n < 2^63 has at most 103,680 divisors, so one task never finds more than half of that;
+# hits that do not fit (object-dtype big ints, or more than this) are pickled back instead
+MAX_HITS_PER_TASK = 1 << 16
+
+_shared = {}
+
+
+@functools.lru_cache(maxsize=None)
+def mpi_launcher():
+    """
+    Which MPI `mpirun` on PATH belongs to: "openmpi", "mpich" or "unknown".
+
+    Open MPI needs --oversubscribe and `--bind-to <x>:overload-allowed` to run
+    more ranks than CPUs; MPICH's Hydra launcher rejects both and oversubscribes
+    without being asked.
+    """
+    try:
+        completed = subprocess.run(
+            ["mpirun", "--version"], capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+    version = completed.stdout + completed.stderr
+    if "Open MPI" in version or "OpenRTE" in version:
+        return "openmpi"
+    if "HYDRA" in version or "MPICH" in version or "Intel(R) MPI" in version:
+        return "mpich"
+    return "unknown"
+
+
+def split_range(start, end, parts):
+    """Cut [start, end) into `parts` contiguous, nearly equal blocks"""
+    total = max(0, end - start)
+    parts = max(1, min(parts, total))
+    chunk, extra = divmod(total, parts)
+    bounds = []
+    lo = start
+    for i in range(parts):
+        hi = lo + chunk + (1 if i < extra else 0)
+        bounds.append((lo, hi))
+        lo = hi
+    return bounds
+
+
+def _init_worker(hits, counts, capacity):
+    _shared["hits"] = np.frombuffer(hits, dtype=np.int64).reshape(-1, capacity)
+    _shared["counts"] = np.frombuffer(counts, dtype=np.int64)
+
+
+def _process_task(task, kernel, number, lo, hi, memory_mb):
+    found = kernel(number, lo, hi, memory_mb)
+    if found.dtype == object or found.size > _shared["hits"].shape[1]:
+        return found
+    _shared["hits"][task, : found.size] = found
+    _shared["counts"][task] = found.size
+    return None
+
+
+def run_process(kernel, number, bounds, workers, memory_mb):
+    capacity = min(MAX_HITS_PER_TASK, max(hi - lo for lo, hi in bounds)) or 1
+    hits = multiprocessing.RawArray("q", len(bounds) * capacity)
+    counts = multiprocessing.RawArray("q", len(bounds))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(hits, counts, capacity),
+    ) as pool:
+        futures = [
+            pool.submit(_process_task, task, kernel, number, lo, hi, memory_mb)
+            for task, (lo, hi) in enumerate(bounds)
+        ]
+        overflow = [future.result() for future in futures]
+
+    hits = np.frombuffer(hits, dtype=np.int64).reshape(-1, capacity)
+    counts = np.frombuffer(counts, dtype=np.int64)
+    return [
+        overflow[task] if overflow[task] is not None else hits[task, :count]
+        for task, count in enumerate(counts)
+    ]
+
+
+def run_thread(kernel, number, bounds, workers, memory_mb):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(lambda b: kernel(number, b[0], b[1], memory_mb), bounds)
+        )
+
+
+def run_local(backend, kernel, number, start, end, workers, memory_mb, tasks=None):
+    """
+    Scan [start, end) with `kernel` on a process or thread pool.
+
+    The range is cut into `tasks` blocks (default: one per worker); more tasks
+    than workers lets the pool balance load dynamically. Returns the hits in
+    ascending order.
+    """
+    bounds = split_range(start, end, tasks or workers)
+    if not bounds or bounds[0][0] >= end:
+        return np.zeros(0, dtype=np.int64)
+
+    runner = run_process if backend == "process" else run_thread
+    return np.concatenate(runner(kernel, number, bounds, workers, memory_mb))
+
+
+def smallest_local(backend, kernel, number, start, end, workers, memory_mb, block):
+    """
+    Smallest divisor in [start, end) on a local pool, or None.
+
+    Blocks are submitted in ascending order with at most 2 * workers in flight;
+    once a block hits, nothing beyond it is submitted and queued blocks beyond
+    it are cancelled, while every block below it still completes.
+    Returns (factor, time_to_first, total) in seconds.
+    """
+    blocks = -(-max(0, end - start) // block)
+    pool_type = ProcessPoolExecutor if backend == "process" else ThreadPoolExecutor
+
+    t_start = time.perf_counter()
+    best_block = blocks
+    best = None
+    t_first = None
+    next_block = 0
+    in_flight = {}
+
+    with pool_type(max_workers=workers) as pool:
+        while True:
+            while len(in_flight) < 2 * workers and next_block < best_block:
+                lo = start + next_block * block
+                future = pool.submit(kernel, number, lo, min(end, lo + block), memory_mb)
+                in_flight[future] = next_block
+                next_block += 1
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                b = in_flight.pop(future)
+                found = future.result()
+                if found.size and b < best_block:
+                    best_block, best = b, int(found[0])
+                    t_first = time.perf_counter() - t_start
+
+            for future, b in list(in_flight.items()):
+                if b > best_block and future.cancel():
+                    del in_flight[future]
+
+    return best, t_first, time.perf_counter() - t_start
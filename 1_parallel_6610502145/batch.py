@@ -0,0 +1,175 @@
+"""
+Batch/stream mode: factor many numbers inside a single MPI launch.
+
+Rank 0 reads integers from a file or stdin in rounds of `batch_size` and
+broadcasts each round. Numbers whose estimated work exceeds `split_threshold`
+are factored by all ranks together, one after another; the rest are packed
+whole onto single ranks (longest-processing-time first) and factored on a
+per-rank self communicator. Rank 0 writes one JSON line per number as results
+arrive.
+"""
+
+import heapq
+import json
+import sys
+import traceback
+from itertools import islice
+from math import isqrt
+
+import numpy as np
+
+DEFAULT_BATCH_SIZE = 4096
+DEFAULT_SPLIT_THRESHOLD = 1 << 22
+
+
+def read_tokens(stream):
+    """Yield the tokens of a text stream: whitespace separated, '#' starts a comment"""
+    for line in stream:
+        yield from line.split("#", 1)[0].split()
+
+
+def read_numbers(stream):
+    """Yield integers from a text stream: whitespace separated, '#' starts a comment"""
+    for token in read_tokens(stream):
+        yield int(token)
+
+
+def check_token(token):
+    """The token as a non-negative int, or the error record batch mode writes for it"""
+    try:
+        number = int(token)
+    except ValueError:
+        return {"number": token, "error": f"not an integer: {token!r}"}
+    if number < 0:
+        return {"number": number, "error": "number must be non-negative"}
+    return number
+
+
+def estimate_cost(number, algorithm):
+    """Rough candidate count needed to factor `number` with `algorithm`"""
+    number = max(number, 0)
+    if algorithm in ("rho", "portfolio"):
+        # rho needs about sqrt(p) <= n^(1/4) steps
+        return isqrt(isqrt(number))
+    return isqrt(number)
+
+
+def pack(costs, bins):
+    """Assign item indices to `bins` ranks, heaviest first onto the least-loaded rank"""
+    assignment = [[] for _ in range(bins)]
+    loads = [(0, b) for b in range(bins)]
+    for i in sorted(range(len(costs)), key=lambda i: costs[i], reverse=True):
+        load, b = heapq.heappop(loads)
+        assignment[b].append(i)
+        heapq.heappush(loads, (load + costs[i] + 1, b))
+    return assignment
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.integer):
+        return int(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_record(out, result):
+    out.write(json.dumps(result, default=_json_default) + "\n")
+
+
+def _open(path, mode):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(path, mode, encoding="utf-8")
+
+
+def run(
+    comm,
+    solve,
+    input_path,
+    output_path="-",
+    algorithm="trial",
+    batch_size=DEFAULT_BATCH_SIZE,
+    split_threshold=DEFAULT_SPLIT_THRESHOLD,
+):
+    """
+    Stream numbers through `solve(comm, number)` on every rank of `comm`.
+
+    `solve` must return the result dict on rank 0 of the communicator it is
+    given and None elsewhere (see parallel.solve). A token that is not a
+    non-negative integer, or a number whose single-rank solve raises, gets a
+    {"number", "error"} record instead; any other failure aborts the
+    communicator after rank 0 has flushed what it wrote.
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    # same as MPI.COMM_SELF, without importing mpi4py here
+    self_comm = comm.Split(color=rank, key=0)
+    source = out = None
+
+    try:
+        if rank == 0:
+            source = _open(input_path, "r")
+            entries = (check_token(token) for token in read_tokens(source))
+            out = _open(output_path, "w")
+
+        while True:
+            numbers = None
+            if rank == 0:
+                chunk = list(islice(entries, batch_size))
+                # bad tokens are answered here and never reach the other ranks
+                for entry in chunk:
+                    if isinstance(entry, dict):
+                        write_record(out, entry)
+                numbers = [n for n in chunk if not isinstance(n, dict)] if chunk else None
+            numbers = comm.bcast(numbers, root=0)
+            if numbers is None:
+                break
+            _run_round(comm, self_comm, solve, numbers, algorithm, split_threshold, out)
+    except Exception:
+        # a rank that fails mid-round would leave the others blocked in a collective
+        traceback.print_exc()
+        if out is not None:
+            out.flush()
+        comm.Abort(1)
+
+    self_comm.Free()
+    if rank == 0:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+def _solve_alone(solve, self_comm, number):
+    """solve() on this rank only; a failure touches no other rank, so it becomes a record"""
+    try:
+        return solve(self_comm, number)
+    except Exception as e:
+        return {"number": number, "error": f"{type(e).__name__}: {e}"}
+
+
+def _run_round(comm, self_comm, solve, chunk, algorithm, split_threshold, out):
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    costs = [estimate_cost(n, algorithm) for n in chunk]
+    large = [n for n, c in zip(chunk, costs) if size > 1 and c > split_threshold]
+    small = [(n, c) for n, c in zip(chunk, costs) if size == 1 or c <= split_threshold]
+
+    # large numbers: every rank works on each one together
+    for number in large:
+        result = solve(comm, number)
+        if rank == 0:
+            write_record(out, result)
+            out.flush()
+
+    # small numbers: packed whole onto single ranks
+    mine = pack([c for _, c in small], size)[rank]
+    local = [_solve_alone(solve, self_comm, small[i][0]) for i in mine]
+    gathered = comm.gather(local, root=0)
+
+    if rank == 0:
+        for results in gathered:
+            for result in results:
+                write_record(out, result)
+        out.flush()
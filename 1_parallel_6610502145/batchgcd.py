@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Bernstein batch GCD: find every input that shares a prime with another input.
+
+    mpirun -n 4 python3 batchgcd.py moduli.txt --output shared.jsonl
+    python3 batchgcd.py moduli.txt --backend process --workers 8
+
+Product tree: level 0 is the input, level k+1 holds the products of adjacent
+pairs of level k, up to the product P of everything. Remainder tree: going back
+down, node i of level k gets R_{k+1}[i // 2] mod L_k[i]^2, so leaf x ends with
+P mod x^2 and gcd((P mod x^2) / x, x) is the product of the primes x shares
+with the rest of the set. That is O(N log^2 N) big-number work instead of N^2
+pairwise gcds, and one launch instead of one per number.
+
+Every level lives in a file under --work-dir and is streamed through in chunks
+of --chunk-size nodes, so memory holds a chunk of two adjacent levels rather
+than the tree (the few nodes near the root are as large as the whole input
+put together; that much is inherent). Within a chunk the multiplications and
+reductions are spread over MPI ranks or a local pool. Rank 0 does all file IO.
+
+Output: one JSON line per input that shares a factor, with its 0-based index,
+the shared factor and the cofactor. When all of a number's primes are shared
+(or it is duplicated) the gcd is the number itself; those are split with
+pairwise gcds against the other flagged numbers, a small set in practice.
+"""
+
+import argparse
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+import backends
+import batch
+import bigint
+
+DEFAULT_CHUNK_SIZE = 4096
+LENGTH = struct.Struct("<Q")
+
+
+def write_ints(path, values):
+    """Store integers as (8-byte length, big-endian bytes) records; returns the count"""
+    count = 0
+    with open(path, "wb") as out:
+        for value in values:
+            value = int(value)
+            data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+            out.write(LENGTH.pack(len(data)))
+            out.write(data)
+            count += 1
+    return count
+
+
+def read_ints(path):
+    """Stream the integers of a write_ints() file"""
+    with open(path, "rb") as src:
+        while True:
+            header = src.read(LENGTH.size)
+            if not header:
+                return
+            (length,) = LENGTH.unpack(header)
+            yield int.from_bytes(src.read(length), "big")
+
+
+def read_input(path):
+    """Integers from a .npy array (memory-mapped) or a text file like batch mode's"""
+    if str(path).endswith(".npy"):
+        array = np.load(path, mmap_mode="r")
+        for lo in range(0, array.size, DEFAULT_CHUNK_SIZE):
+            yield from array[lo : lo + DEFAULT_CHUNK_SIZE].tolist()
+        return
+    with open(path, encoding="utf-8") as src:
+        yield from batch.read_numbers(src)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def multiply(pair):
+    a, b = pair
+    return a if b is None else bigint.fast_int(a) * bigint.fast_int(b)
+
+
+def reduce_node(pair):
+    r, x = pair
+    x = bigint.fast_int(x)
+    return bigint.fast_int(r) % (x * x)
+
+
+def leaf_gcd(pair):
+    """gcd((P mod x^2) / x, x): the part of x shared with the other inputs"""
+    r, x = pair
+    x = bigint.fast_int(x)
+    return bigint.gcd((bigint.fast_int(r) % (x * x)) // x, x)
+
+
+class LevelMapper:
+    """
+    map(func, items) over MPI ranks, a local pool, or inline.
+
+    Under MPI every rank calls map() in lockstep; rank 0 passes the items and
+    gets the results in order, the other ranks pass None and get None.
+    """
+
+    def __init__(self, comm=None, backend="mpi", workers=1):
+        self.comm = comm
+        self.pool = None
+        if comm is None and workers > 1:
+            pool_type = ProcessPoolExecutor if backend == "process" else ThreadPoolExecutor
+            self.pool = pool_type(max_workers=workers)
+        self.workers = workers
+
+    def map(self, func, items):
+        if self.comm is not None:
+            size = self.comm.Get_size()
+            slices = None
+            if items is not None:
+                slices = [items[lo:hi] for lo, hi in backends.split_range(0, len(items), size)]
+                slices += [[]] * (size - len(slices))
+            mine = self.comm.scatter(slices, root=0)
+            gathered = self.comm.gather([func(item) for item in mine], root=0)
+            return [value for part in gathered for value in part] if items is not None else None
+        if self.pool is not None:
+            chunksize = max(1, len(items) // (4 * self.workers))
+            return list(self.pool.map(func, items, chunksize=chunksize))
+        return [func(item) for item in items]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def stream_level(mapper, func, chunks, out_path):
+    """
+    Apply func to every item of the chunk stream and write the results to out_path.
+
+    `chunks` is only consumed on rank 0; the other ranks learn from a broadcast
+    flag whether another chunk follows. Returns the number of results written.
+    """
+    comm = mapper.comm
+    root = comm is None or comm.Get_rank() == 0
+
+    def results():
+        for items in chunks:
+            if comm is not None:
+                comm.bcast(True, root=0)
+            yield from mapper.map(func, items)
+        if comm is not None:
+            comm.bcast(False, root=0)
+
+    if root:
+        return write_ints(out_path, results())
+    while comm.bcast(None, root=0):
+        mapper.map(func, None)
+    return None
+
+
+def pairs(values):
+    """(a, b) for adjacent values, (last, None) when the count is odd"""
+    iterator = iter(values)
+    for a in iterator:
+        yield a, next(iterator, None)
+
+
+def batch_gcd(mapper, input_path, work_dir, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Run the product and remainder trees over the integers in `input_path`.
+
+    Returns (count, shared) on rank 0, where shared lists (index, number, gcd)
+    for every input whose gcd with the product of the others exceeds 1;
+    (None, None) on the other ranks.
+    """
+    comm = mapper.comm
+    root = comm is None or comm.Get_rank() == 0
+    work_dir = Path(work_dir)
+
+    def level(k):
+        return work_dir / f"product_{k}.bin"
+
+    def remainder(k):
+        return work_dir / f"remainder_{k}.bin"
+
+    # inputs below 2 enter as 1, which shares nothing but keeps the indices aligned
+    leaves = (n if n > 1 else 1 for n in read_input(input_path))
+    count = write_ints(level(0), leaves) if root else None
+    if comm is not None:
+        count = comm.bcast(count, root=0)
+    if count < 2:
+        return (count, []) if root else (None, None)
+
+    # product tree, one level at a time
+    counts = [count]
+    while counts[-1] > 1:
+        k = len(counts) - 1
+        chunks = chunked(pairs(read_ints(level(k))), chunk_size) if root else None
+        stream_level(mapper, multiply, chunks, level(k + 1))
+        counts.append((counts[-1] + 1) // 2)
+
+    # remainder tree: the root is its own remainder
+    top = len(counts) - 1
+    if root:
+        os.replace(level(top), remainder(top))
+    for k in range(top - 1, -1, -1):
+        chunks = None
+        if root:
+            parents = read_ints(remainder(k + 1))
+            nodes = read_ints(level(k))
+            # each parent remainder serves its two children
+            items = ((r, x) for r, pair in zip(parents, pairs(nodes)) for x in pair if x is not None)
+            chunks = chunked(items, chunk_size)
+        func = leaf_gcd if k == 0 else reduce_node
+        out = remainder(k) if k else work_dir / "gcd.bin"
+        stream_level(mapper, func, chunks, out)
+        if root:
+            os.remove(remainder(k + 1))
+            if k + 1 != top:
+                os.remove(level(k + 1))
+
+    if not root:
+        return None, None
+    shared = [
+        (index, number, g)
+        for index, (number, g) in enumerate(zip(read_ints(level(0)), read_ints(work_dir / "gcd.bin")))
+        if g > 1
+    ]
+    os.remove(level(0))
+    os.remove(work_dir / "gcd.bin")
+    return count, shared
+
+
+def split_full(shared):
+    """
+    Replace gcd == number (every prime shared, or a duplicate) by a proper factor.
+
+    Pairwise gcds against the other flagged numbers; a number whose only
+    partners are copies of itself keeps gcd == number.
+    """
+    resolved = []
+    for index, number, g in shared:
+        if g == number:
+            for _, other, _ in shared:
+                d = bigint.gcd(number, other)
+                if 1 < d < number:
+                    g = d
+                    break
+        resolved.append({"index": index, "number": number, "shared_factor": g, "cofactor": number // g})
+    return resolved
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Batch GCD: report every input that shares a prime factor with another input."
+    )
+    parser.add_argument("input", help="Integers as text (batch-mode format) or a .npy array.")
+    parser.add_argument(
+        "--output", default="-", help="JSON Lines output file, or '-' for stdout (default: -)."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=backends.BACKENDS,
+        default="mpi",
+        help="mpi: ranks launched by mpirun; process/thread: a local pool of --workers (default: mpi).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Pool size for the process/thread backends (default: CPU count).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Tree nodes held in memory per level while streaming (default: {DEFAULT_CHUNK_SIZE}).",
+    )
+    parser.add_argument(
+        "--work-dir",
+        help="Directory for the tree level files (default: a temporary directory, removed afterwards).",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.chunk_size < 2:
+        parser.error("--chunk-size must be at least 2")
+    return args
+
+
+def main():
+    args = parse_args()
+    comm = None
+    if args.backend == "mpi":
+        from mpi4py import MPI
+
+        comm = MPI.COMM_WORLD
+    root = comm is None or comm.Get_rank() == 0
+
+    work_dir = args.work_dir
+    cleanup = work_dir is None
+    if root:
+        work_dir = work_dir or tempfile.mkdtemp(prefix="batchgcd_")
+        os.makedirs(work_dir, exist_ok=True)
+    if comm is not None:
+        work_dir = comm.bcast(work_dir, root=0)
+
+    mapper = LevelMapper(comm, args.backend, args.workers)
+    t0 = time.perf_counter()
+    try:
+        count, shared = batch_gcd(mapper, args.input, work_dir, args.chunk_size)
+    finally:
+        mapper.close()
+        if root and cleanup:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    if not root:
+        return
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    for record in split_full(shared):
+        batch.write_record(out, record)
+    if out is not sys.stdout:
+        out.close()
+    print(
+        f"{count} numbers, {len(shared)} share a factor ({time.perf_counter() - t0:.3f}s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
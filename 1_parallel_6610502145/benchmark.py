@@ -1,12 +1,29 @@
 import argparse
 import csv
+import functools
+import json
+import os
 import shutil
 import subprocess
+import tempfile
 import time
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
+import backends
+import factorlib
+import history
+import parallel
 import plot_results
+import resources
+import timing
+
+BACKENDS = parallel.CHOICES["backend"]
+
+CONFIDENCE = 0.95
+BOOTSTRAP_RESAMPLES = 2000
 
 CASES = {
     "min": {
@@ -19,9 +36,25 @@ CASES = {
         "graph_dir": Path("max_graph"),
         "display": "2^55",
     },
+    # 128-bit product of the four largest 32-bit primes: keeps the big-int path
+    # visible; sqrt(n) is far out of trial-division reach, so it always uses rho
+    "big": {
+        "number": 4294967291 * 4294967279 * 4294967231 * 4294967197,
+        "graph_dir": Path("big_graph"),
+        "display": "~2^128",
+        "algorithm": "rho",
+    },
 }
 
 
+def parse_size(text):
+    """Problem size for --sizes: a plain integer or a power written as 2^40"""
+    if "^" in text:
+        base, exponent = text.split("^")
+        return int(base) ** int(exponent)
+    return int(text)
+
+
 def parse_args():
     parser = argparse.ArgumentParser(
         description="Run MPI factorization benchmarks and generate plots automatically."
@@ -32,51 +65,449 @@ def parse_args():
         default="all",
         help="Choose which dataset to benchmark (default: all).",
     )
+    parser.add_argument(
+        "--sweep",
+        choices=["strong", "weak", "grid"],
+        default="strong",
+        help=(
+            "strong: the case's number at every process count; weak: the number grows as "
+            "N^2 so each rank keeps the same trial-division work; grid: every --sizes "
+            "number at every process count (default: strong)."
+        ),
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=parse_size,
+        help="Numbers for --sweep grid, e.g. 2^30 2^35 2^40 (default: n/2^10, n/2^5, n of the case).",
+    )
+    parser.add_argument(
+        "--bind",
+        nargs="+",
+        choices=["core", "socket", "none"],
+        help="mpi backend: sweep these mpirun --bind-to policies (default: MPI's own choice).",
+    )
+    parser.add_argument(
+        "--map-by",
+        nargs="+",
+        choices=["core", "socket"],
+        help="mpi backend: sweep these mpirun --map-by policies (default: MPI's own choice).",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        metavar="SECONDS",
+        help="Also sample /proc/<pid>/stat of every rank this often for per-rank CPU and RSS.",
+    )
+    parser.add_argument(
+        "--history",
+        default=history.DEFAULT_PATH,
+        help=f"SQLite history store every run is appended to (default: {history.DEFAULT_PATH}).",
+    )
+    parser.add_argument(
+        "--no-history", action="store_true", help="Do not append this run to the history store."
+    )
+    parser.add_argument(
+        "--preview-plots",
+        action="store_true",
+        help="Render graphs at low dpi without seaborn styling (much faster).",
+    )
+    parser.add_argument(
+        "--plot-workers",
+        type=int,
+        help="Processes rendering the graphs in parallel (default: CPU count).",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help=(
+            "Let parallel.py use its factorization cache; by default every run passes "
+            "--no-cache, since repeats would otherwise time a cache lookup."
+        ),
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help=(
+            "Call factorlib.factorize in this interpreter, timed with perf_counter_ns, "
+            "instead of launching parallel.py: no interpreter start or mpirun in the "
+            "numbers (process/thread backends only)."
+        ),
+    )
     parser.add_argument(
         "--process-max",
         type=int,
         default=15,
         help="Highest number of processes to benchmark (>=1).",
     )
+    parser.add_argument(
+        "--backend",
+        choices=["all"] + BACKENDS,
+        default="mpi",
+        help="Execution backend to benchmark; 'all' sweeps every backend (default: mpi).",
+    )
+    parser.add_argument(
+        "--algorithm",
+        choices=parallel.CHOICES["algorithm"],
+        default="trial",
+        help="Algorithm passed to parallel.py (default: trial).",
+    )
+    parser.add_argument(
+        "--kernel",
+        choices=parallel.CHOICES["kernel"],
+        default="loop",
+        help="Trial-division kernel passed to parallel.py (default: loop).",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=parallel.CHOICES["schedule"],
+        default="static",
+        help="Work distribution passed to parallel.py (default: static).",
+    )
+    parser.add_argument(
+        "--collect",
+        choices=parallel.CHOICES["collect"],
+        default="gatherv",
+        help="Result collection passed to parallel.py (default: gatherv).",
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=float,
+        default=None,
+        help="Per-rank memory budget for the vectorized kernel.",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=1,
+        help="Untimed runs before the measured ones, per process count (default: 1).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Most measured runs per process count (default: 5).",
+    )
+    parser.add_argument(
+        "--min-repeat",
+        type=int,
+        default=history.MIN_SAMPLES,
+        help=(
+            "Measured runs before adaptive stopping may kick in; fewer than "
+            f"{history.MIN_SAMPLES} cannot be flagged by history.py compare "
+            f"(default: {history.MIN_SAMPLES})."
+        ),
+    )
+    parser.add_argument(
+        "--ci-target",
+        type=float,
+        default=0.05,
+        help=(
+            f"Stop repeating once the {CONFIDENCE * 100:.0f}%% bootstrap CI of the median is narrower "
+            "than this fraction of the median; 0 always runs --repeat times (default: 0.05)."
+        ),
+    )
     return parser.parse_args()
 
 
-def run_benchmark(number, process_range):
+def detect_cores():
+    """
+    (physical cores, logical CPUs) available to this process.
+
+    Logical CPUs come from the affinity mask (respects taskset/cgroups);
+    physical cores count distinct (physical id, core id) pairs in /proc/cpuinfo,
+    falling back to the logical count where that file is missing.
+    """
+    logical = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    cores = set()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as cpuinfo:
+            physical_id = core_id = None
+            for line in cpuinfo:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical_id = value.strip()
+                elif key == "core id":
+                    core_id = value.strip()
+                elif not key and core_id is not None:
+                    cores.add((physical_id, core_id))
+                    physical_id = core_id = None
+            if core_id is not None:
+                cores.add((physical_id, core_id))
+    except OSError:
+        pass
+    return min(len(cores), logical) if cores else logical, logical
+
+
+def placement_args(nproc, bind, map_by, logical, launcher=None):
+    """
+    mpirun placement flags. Under Open MPI, running past the CPU count needs
+    --oversubscribe and a binding that allows overload; other launchers
+    (MPICH) reject those and oversubscribe on their own.
+    """
+    openmpi = (launcher or backends.mpi_launcher()) == "openmpi"
+    args = []
+    oversubscribed = nproc > logical and openmpi
+    if oversubscribed:
+        args.append("--oversubscribe")
+    if map_by is not None:
+        args += ["--map-by", map_by]
+    if bind is not None:
+        args += ["--bind-to", f"{bind}:overload-allowed" if oversubscribed and bind != "none" else bind]
+    return args
+
+
+def build_command(backend, nproc, number, extra_args, bind=None, map_by=None, logical=None):
+    """mpirun launch for the mpi backend, a plain interpreter with --workers otherwise"""
+    if backend == "mpi":
+        placement = placement_args(nproc, bind, map_by, logical or os.cpu_count())
+        return [
+            "mpirun",
+            "-n",
+            str(nproc),
+            *placement,
+            "python3",
+            "parallel.py",
+            str(number),
+            *extra_args,
+        ]
+    return [
+        "python3",
+        "parallel.py",
+        str(number),
+        "--backend",
+        backend,
+        "--workers",
+        str(nproc),
+        *extra_args,
+    ]
+
+
+def bootstrap_ci(samples, confidence=CONFIDENCE, resamples=BOOTSTRAP_RESAMPLES):
+    """Percentile bootstrap confidence interval of the median (fixed seed: reruns agree)"""
+    samples = np.asarray(samples, dtype=float)
+    rng = np.random.default_rng(0)
+    medians = np.median(
+        rng.choice(samples, size=(resamples, samples.size), replace=True), axis=1
+    )
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(medians, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def sample_stats(samples):
+    """Median, quartiles and bootstrap CI of the timed runs of one configuration"""
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    ci_low, ci_high = bootstrap_ci(samples)
+    return {
+        "time_seconds": float(median),
+        "time_q1": float(q1),
+        "time_q3": float(q3),
+        "time_iqr": float(q3 - q1),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "repetitions": len(samples),
+    }
+
+
+def timed_run(command, sample_interval=None):
+    """One launch: (wall-clock seconds, phase summary from parallel.py --timing + resource usage)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        timing_path = Path(tmp) / "timing.json"
+        elapsed, usage = resources.run_measured(
+            command + ["--timing", str(timing_path)], sample_interval
+        )
+        phases = json.loads(timing_path.read_text(encoding="utf-8"))
+    return elapsed, {**timing.summarize(phases), **usage}
+
+
+def timed_call(number, backend, workers, options):
+    """One in-process factorlib.factorize call: (seconds by perf_counter_ns, phase summary)"""
+    start = time.perf_counter_ns()
+    result = factorlib.factorize(number, backend=backend, workers=workers, **options)
+    elapsed = (time.perf_counter_ns() - start) / 1e9
+    return elapsed, timing.summarize(result["timings"])
+
+
+def measure(command, warmup=1, repeat=5, min_repeat=history.MIN_SAMPLES, ci_target=0.05, sample_interval=None):
+    """
+    Warm up, then time up to `repeat` runs of `command`.
+
+    `command` is a parallel.py launch (argv list) or, in-process, a callable
+    returning (seconds, summary) like timed_run().
+
+    After `min_repeat` runs, stops as soon as the bootstrap CI of the median is
+    narrower than `ci_target` times the median. Returns (samples, stats) where
+    stats also holds the per-phase and resource-usage columns as medians over
+    the timed runs.
+    """
+    for _ in range(warmup):
+        if callable(command):
+            command()
+        else:
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+    samples = []
+    phases = []
+    while len(samples) < repeat:
+        if callable(command):
+            elapsed, summary = command()
+        else:
+            elapsed, summary = timed_run(command, sample_interval)
+        samples.append(elapsed)
+        phases.append(summary)
+        if len(samples) >= max(min_repeat, 2) and ci_target > 0:
+            low, high = bootstrap_ci(samples)
+            if high - low < ci_target * np.median(samples):
+                break
+
+    stats = sample_stats(samples)
+    for field in phases[0]:
+        stats[field] = float(np.median([summary[field] for summary in phases]))
+    return samples, stats
+
+
+def run_benchmark(
+    number,
+    process_range,
+    kernel="loop",
+    memory_mb=None,
+    algorithm="trial",
+    schedule="static",
+    backend="mpi",
+    collect="gatherv",
+    warmup=1,
+    repeat=5,
+    min_repeat=history.MIN_SAMPLES,
+    ci_target=0.05,
+    bind=None,
+    map_by=None,
+    sample_interval=None,
+    in_process=False,
+    cache=False,
+):
     results = []
-    print(f"\nRunning benchmark for {number:,}")
+    physical, logical = detect_cores()
+    print(
+        f"\nRunning benchmark for {number:,} (backend: {backend}{' in-process' if in_process else ''}, "
+        f"algorithm: {algorithm}, kernel: {kernel}, schedule: {schedule})"
+    )
+    options = {"algorithm": algorithm, "kernel": kernel, "schedule": schedule, "cache": cache}
+    if memory_mb is not None:
+        options["memory_mb"] = memory_mb
+
+    extra_args = ["--algorithm", algorithm, "--kernel", kernel, "--schedule", schedule]
+    if not cache:
+        # every repeat after the first would time a cache lookup
+        extra_args.append("--no-cache")
+    if backend == "mpi":
+        extra_args += ["--collect", collect]
+    if memory_mb is not None:
+        extra_args += ["--memory-mb", str(memory_mb)]
 
     for nproc in process_range:
         print(f"\n===== Running with {nproc} process(es) =====")
-        start = time.time()
-        subprocess.run(
-            [
-                "mpirun",
-                "-n",
-                str(nproc),
-                "python3",
-                "parallel.py",
-                str(number),
-            ],
-            check=True,
+        if in_process:
+            command = functools.partial(timed_call, number, backend, nproc, options)
+        else:
+            command = build_command(backend, nproc, number, extra_args, bind, map_by, logical)
+        samples, stats = measure(
+            command,
+            warmup,
+            repeat,
+            min_repeat,
+            ci_target,
+            sample_interval,
+        )
+        print(
+            f"Time used: median {stats['time_seconds']:.3f} seconds over {len(samples)} run(s) "
+            f"(IQR {stats['time_iqr']:.3f}, {CONFIDENCE:.0%} CI "
+            f"{stats['ci_low']:.3f}-{stats['ci_high']:.3f})"
+        )
+        if nproc > logical:
+            print(f"⚠️  oversubscribed: {nproc} processes on {logical} logical CPU(s)")
+        results.append(
+            {
+                "num_processes": nproc,
+                "samples": samples,
+                **stats,
+                "bind": bind or "default",
+                "map_by": map_by or "default",
+                "physical_cores": physical,
+                "logical_cpus": logical,
+                # past the physical cores, ranks share a core through hyperthreads
+                "oversubscribed": int(nproc > logical),
+                "hyperthreaded": int(physical < nproc <= logical),
+            }
         )
-        elapsed = time.time() - start
-        print(f"Time used: {elapsed:.3f} seconds")
-        results.append({"num_processes": nproc, "time_seconds": elapsed})
 
     return results
 
 
+def samples_path(csv_path):
+    """Sidecar file holding every timed run behind a results CSV"""
+    return csv_path.with_name(f"{csv_path.stem}_samples.csv")
+
+
+# spread of the timed runs; time_seconds itself is their median
+STAT_FIELDS = ["time_q1", "time_q3", "time_iqr", "ci_low", "ci_high", "repetitions"]
+# per-phase columns reported by parallel.py --timing (min/max/mean over ranks)
+PHASE_FIELDS = [
+    f"{name}_{stat}" for name in timing.PHASES for stat in ("min", "max", "mean")
+] + ["imbalance"]
+# where the ranks ran: mpirun binding/mapping and the detected CPU topology
+PLACEMENT_FIELDS = [
+    "bind",
+    "map_by",
+    "physical_cores",
+    "logical_cpus",
+    "oversubscribed",
+    "hyperthreaded",
+]
+
+
+def measurement_fields(result):
+    fields = (
+        STAT_FIELDS
+        + PHASE_FIELDS
+        + resources.USAGE_FIELDS
+        + resources.SAMPLE_FIELDS
+        + PLACEMENT_FIELDS
+    )
+    return [field for field in fields if field in result]
+
+
+def format_measurements(result, fields):
+    return {
+        field: f"{result[field]:.6f}" if isinstance(result[field], float) else result[field]
+        for field in fields
+    }
+
+
+def write_samples(results, csv_path, keys=("num_processes",)):
+    """Sidecar CSV with one row per timed run"""
+    with open(samples_path(csv_path), "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow([*keys, "repetition", "time_seconds"])
+        for result in results:
+            for i, sample in enumerate(result["samples"], start=1):
+                writer.writerow([*(result[key] for key in keys), i, f"{sample:.6f}"])
+
+
 def write_csv(results, label):
     if not results:
         raise ValueError("No benchmark results to write.")
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     csv_name = f"benchmark_results_{label}_{timestamp}.csv"
+    # time_seconds is the median of the timed runs, so speedup is a ratio of medians
     baseline_time = results[0]["time_seconds"]
+    extra_fields = measurement_fields(results[0])
 
     with open(csv_name, "w", newline="", encoding="utf-8") as csvfile:
         fieldnames = ["num_processes", "time_seconds", "speedup", "efficiency"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames + extra_fields)
         writer.writeheader()
 
         for result in results:
@@ -90,34 +521,113 @@ def write_csv(results, label):
                     "time_seconds": f"{time_sec:.3f}",
                     "speedup": f"{speedup:.3f}",
                     "efficiency": f"{efficiency:.2f}",
+                    **format_measurements(result, extra_fields),
                 }
             )
 
+    if "samples" in results[0]:
+        write_samples(results, Path(csv_name))
+
     return Path(csv_name)
 
 
-def clean_output_dir(directory: Path):
+def sweep_points(sweep, number, process_range, sizes=None):
+    """
+    (number, num_processes) pairs to measure.
+
+    weak: trial division scans sqrt(n) candidates, so n * N^2 keeps the
+          candidates per rank equal to those of `number` on one rank
+    grid: every size in `sizes` (default: number / 2^10, number / 2^5, number)
+          at every process count
+    """
+    if sweep == "weak":
+        return [(number * nproc**2, nproc) for nproc in process_range]
+    sizes = sizes or [max(2, number >> 10), max(2, number >> 5), number]
+    return [(size, nproc) for size in sizes for nproc in process_range]
+
+
+def write_sweep_csv(results, sweep, label):
+    """
+    Tidy CSV: one row per (number, num_processes).
+
+    grid: speedup/efficiency are strong scaling within each number.
+    weak: speedup is Gustafson's scaled speedup N * T(1) / T(N) and efficiency
+          is T(1) / T(N), the baseline being the smallest process count.
+    """
+    if not results:
+        raise ValueError("No benchmark results to write.")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_path = Path(f"benchmark_sweep_{sweep}_{label}_{timestamp}.csv")
+    extra_fields = measurement_fields(results[0])
+
+    baselines = {}
+    for result in results:
+        key = None if sweep == "weak" else result["number"]
+        baselines.setdefault(key, result)
+
+    with open(csv_path, "w", newline="", encoding="utf-8") as csvfile:
+        fieldnames = [
+            "sweep",
+            "number",
+            "size_bits",
+            "num_processes",
+            "time_seconds",
+            "speedup",
+            "efficiency",
+        ]
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames + extra_fields)
+        writer.writeheader()
+
+        for result in results:
+            nproc = result["num_processes"]
+            time_sec = result["time_seconds"]
+            base = baselines[None if sweep == "weak" else result["number"]]
+            ratio = base["time_seconds"] / time_sec if time_sec else float("inf")
+            scale = nproc / base["num_processes"]
+            if sweep == "weak":
+                speedup, efficiency = scale * ratio, ratio * 100
+            else:
+                speedup, efficiency = ratio, ratio / scale * 100
+            writer.writerow(
+                {
+                    "sweep": sweep,
+                    "number": result["number"],
+                    "size_bits": f"{np.log2(float(result['number'])):.2f}",
+                    "num_processes": nproc,
+                    "time_seconds": f"{time_sec:.3f}",
+                    "speedup": f"{speedup:.3f}",
+                    "efficiency": f"{efficiency:.2f}",
+                    **format_measurements(result, extra_fields),
+                }
+            )
+
+    write_samples(results, csv_path, keys=("number", "num_processes"))
+    return csv_path
+
+
+def clean_output_dir(directory: Path, keep=()):
+    """Empty `directory`, except the names in `keep` (rendered outputs that may be reused)"""
     directory.mkdir(parents=True, exist_ok=True)
     for item in directory.iterdir():
+        if item.name in keep:
+            continue
         if item.is_file():
             item.unlink()
         else:
             shutil.rmtree(item)
 
 
-def generate_plots(csv_path: Path, output_dir: Path):
-    clean_output_dir(output_dir)
+def generate_plots(csv_path: Path, output_dir: Path, preview=False, workers=None):
+    """Render every figure for the CSV (skipping unchanged ones) and copy the CSVs alongside"""
     df = plot_results.load_data(csv_path)
+    clean_output_dir(output_dir, keep={*plot_results.figures_for(df), plot_results.MANIFEST})
 
-    plot_results.plot_execution_time(df, str(output_dir))
-    plot_results.plot_speedup(df, str(output_dir))
-    plot_results.plot_efficiency(df, str(output_dir))
-    plot_results.plot_combined_metrics(df, str(output_dir))
-    plot_results.plot_scalability(df, str(output_dir))
-    plot_results.plot_comparative_analysis(df, str(output_dir))
-    plot_results.generate_summary_report(df, str(output_dir))
+    plot_results.render_all(df, str(output_dir), preview, workers)
 
     shutil.copy(csv_path, output_dir / csv_path.name)
+    if samples_path(csv_path).exists():
+        shutil.copy(samples_path(csv_path), output_dir / samples_path(csv_path).name)
 
 
 def main():
@@ -125,12 +635,22 @@ def main():
 
     if args.process_max < 1:
         raise ValueError("--process-max must be at least 1.")
+    if args.warmup < 0 or args.repeat < 1 or args.min_repeat < 1:
+        raise ValueError("--warmup must be >= 0, --repeat and --min-repeat >= 1.")
 
+    # before any output is written, so the benchmark's own graphs do not count as changes
+    commit = None if args.no_history else history.git_commit()
     process_range = range(1, args.process_max + 1)
     if args.case == "all":
         cases_to_run = CASES.items()
     else:
         cases_to_run = [(args.case, CASES[args.case])]
+    selected_backends = BACKENDS if args.backend == "all" else [args.backend]
+    if args.in_process:
+        # ranks need mpirun; the pools run inside this interpreter
+        selected_backends = [backend for backend in selected_backends if backend != "mpi"]
+        if not selected_backends:
+            raise ValueError("--in-process needs --backend process, thread or all.")
 
     for label, config in cases_to_run:
         number = config["number"]
@@ -141,12 +661,100 @@ def main():
         print(f"CASE: {label.upper()} ({display})")
         print("=" * 70)
 
-        results = run_benchmark(number, process_range)
-        csv_path = write_csv(results, label)
-        generate_plots(csv_path, graph_dir)
+        algorithm = config.get("algorithm", args.algorithm)
+        method = (
+            f"{args.kernel}_{args.schedule}" if algorithm == "trial" else algorithm
+        )
+
+        for backend in selected_backends:
+            # placement flags only exist for mpirun; pools always run unpinned
+            if backend == "mpi":
+                placements = [
+                    (bind, map_by)
+                    for bind in args.bind or [None]
+                    for map_by in args.map_by or [None]
+                ]
+            else:
+                placements = [(None, None)]
+
+            best = {}
+            for bind, map_by in placements:
+                run = functools.partial(
+                    run_benchmark,
+                    kernel=args.kernel,
+                    memory_mb=args.memory_mb,
+                    algorithm=algorithm,
+                    schedule=args.schedule,
+                    backend=backend,
+                    collect=args.collect,
+                    warmup=args.warmup,
+                    repeat=args.repeat,
+                    min_repeat=args.min_repeat,
+                    ci_target=args.ci_target,
+                    bind=bind,
+                    map_by=map_by,
+                    sample_interval=args.sample_interval,
+                    in_process=args.in_process,
+                    cache=args.cache,
+                )
+                # in-process timings are not comparable with launches, so they get their own label
+                backend_label = f"{backend}-inprocess" if args.in_process else backend
+                # mpi keeps the original graph directory; other backends get a sibling
+                suffix = "" if backend == "mpi" else f"_{backend_label}"
+                run_label = f"{label}_{backend_label}_{method}"
+                if bind is not None or map_by is not None:
+                    placement = f"bind-{bind or 'default'}_map-{map_by or 'default'}"
+                    suffix += f"_{placement}"
+                    run_label += f"_{placement}"
+
+                if args.sweep != "strong":
+                    results = []
+                    for sweep_number, nproc in sweep_points(
+                        args.sweep, number, process_range, args.sizes
+                    ):
+                        result = run(sweep_number, [nproc])[0]
+                        results.append({"number": sweep_number, **result})
+
+                    output_dir = graph_dir.with_name(f"{graph_dir.name}{suffix}_{args.sweep}")
+                    csv_path = write_sweep_csv(results, args.sweep, run_label)
+                    generate_plots(csv_path, output_dir, args.preview_plots, args.plot_workers)
+                    sweep = args.sweep
+                else:
+                    results = run(number, process_range)
+                    output_dir = graph_dir.with_name(f"{graph_dir.name}{suffix}")
+                    csv_path = write_csv(results, run_label)
+                    generate_plots(csv_path, output_dir, args.preview_plots, args.plot_workers)
+                    sweep = "strong"
+
+                if not args.no_history:
+                    # the graph directory is wiped on every run; the store keeps the past
+                    history.record(
+                        args.history,
+                        results,
+                        backend_label,
+                        label,
+                        run_label.removeprefix(f"{label}_{backend_label}_"),
+                        sweep,
+                        number,
+                        commit,
+                    )
+                    print(f"✓ Recorded in {args.history} (commit {commit})")
+
+                for result in results:
+                    key = (result.get("number", number), result["num_processes"])
+                    if key not in best or result["time_seconds"] < best[key][0]:
+                        best[key] = (result["time_seconds"], bind, map_by)
+
+                print(f"\n✓ CSV saved to {csv_path}")
+                print(f"✓ Graphs exported to {output_dir.resolve()}")
 
-        print(f"\n✓ CSV saved to {csv_path}")
-        print(f"✓ Graphs exported to {graph_dir.resolve()}")
+            if len(placements) > 1:
+                print("\nBest placement per configuration (median time):")
+                for (run_number, nproc), (seconds, bind, map_by) in sorted(best.items()):
+                    print(
+                        f"  n={run_number:<22} N={nproc:<4} bind={bind or 'default':<8} "
+                        f"map-by={map_by or 'default':<8} {seconds:.3f}s"
+                    )
 
     print("\nAll requested benchmarks completed.")
 
@@ -0,0 +1,66 @@
+"""
+Exact arbitrary-precision helpers for the factorization kernels.
+
+gmpy2 is optional. When it is installed, numbers wider than int64 are wrapped
+in gmpy2.mpz for the modulo-heavy loops; otherwise plain Python ints are used,
+which are just as exact, only slower.
+"""
+
+from math import gcd as _math_gcd
+
+import numpy as np
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+INT64_MAX = 2**63 - 1
+
+# the limb kernel keeps (remainder << shift) + limb below 2^63, so it needs
+# candidates narrow enough to leave at least this many bits per limb
+MIN_LIMB_BITS = 8
+
+
+def fast_int(n):
+    """n as gmpy2.mpz when gmpy2 is installed and n is wider than int64, else n itself"""
+    if gmpy2 is not None and abs(n) > INT64_MAX:
+        return gmpy2.mpz(n)
+    return n
+
+
+def gcd(a, b):
+    if gmpy2 is not None:
+        return int(gmpy2.gcd(a, b))
+    return _math_gcd(a, b)
+
+
+def limb_shift(max_candidate):
+    """Bits per limb for candidates up to `max_candidate`, or None if they are too wide"""
+    shift = 62 - max_candidate.bit_length()
+    return shift if shift >= MIN_LIMB_BITS else None
+
+
+def to_limbs(num, shift):
+    """Base-2^shift digits of num, most significant first"""
+    mask = (1 << shift) - 1
+    limbs = []
+    while num:
+        limbs.append(num & mask)
+        num >>= shift
+    return limbs[::-1] or [0]
+
+
+def mod_limbs(limbs, shift, candidates, out):
+    """
+    out[:] = num % candidates for a num wider than int64, all in int64.
+
+    Horner's rule over the limbs: r = ((r << shift) + limb) % d never exceeds
+    2^63 because r < d < 2^(62 - shift).
+    """
+    out.fill(0)
+    for limb in limbs:
+        np.left_shift(out, shift, out=out)
+        np.add(out, limb, out=out)
+        np.remainder(out, candidates, out=out)
+    return out
@@ -0,0 +1,170 @@
+"""
+Persistent on-disk cache of prime factorizations (SQLite).
+
+Two tables, both size-bounded by least-recent use:
+  factorizations  number -> [[prime, exponent], ...]
+  primes          every prime seen in a stored factorization
+
+A number that is not stored itself can still be resolved when the cached
+primes that divide it leave a cofactor that is 1, prime, or cached: e.g. once
+2^40 is stored, 3 * 2^40 only needs one Miller-Rabin check.
+
+Entries are checked when read: a factorization whose product is not the
+number, or whose "primes" fail rho.is_prime (e.g. written before a primality
+fix), is deleted and counts as a miss, and so is such a prime.
+"""
+
+import json
+import sqlite3
+import time
+
+import rho
+
+DEFAULT_PATH = "factor_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS factorizations (
+    number TEXT PRIMARY KEY,
+    factors TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS primes (
+    prime TEXT PRIMARY KEY,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS factorizations_lru ON factorizations (last_used);
+CREATE INDEX IF NOT EXISTS primes_lru ON primes (last_used);
+"""
+
+_open = {}
+
+
+class FactorCache:
+    def __init__(self, path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = str(path)
+        self.max_entries = max_entries
+        # several ranks may share the file in batch mode; wait for their writes
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.executescript(SCHEMA)
+
+    def get(self, number):
+        """Stored factorization of `number` as {prime: exponent}, or None"""
+        row = self.db.execute(
+            "SELECT factors FROM factorizations WHERE number = ?", (str(number),)
+        ).fetchone()
+        if row is None:
+            return None
+        factors = {p: e for p, e in json.loads(row[0])}
+        if not verified(number, factors):
+            self.invalidate(number)
+            return None
+        with self.db:
+            self.db.execute(
+                "UPDATE factorizations SET last_used = ? WHERE number = ?",
+                (time.time(), str(number)),
+            )
+        return factors
+
+    def invalidate(self, number):
+        """Forget the stored factorization of `number`, and any entry of it in `primes` that is not prime"""
+        row = self.db.execute(
+            "SELECT factors FROM factorizations WHERE number = ?", (str(number),)
+        ).fetchone()
+        with self.db:
+            self.db.execute("DELETE FROM factorizations WHERE number = ?", (str(number),))
+            if row is not None:
+                self.db.executemany(
+                    "DELETE FROM primes WHERE prime = ?",
+                    [(str(p),) for p, _ in json.loads(row[0]) if not rho.is_prime(p)],
+                )
+
+    def resolve(self, number):
+        """Factorization of `number` from the cache, directly or via cached primes; None on a miss"""
+        if number < 2:
+            return None
+        factors = self.get(number)
+        if factors is not None:
+            return factors
+
+        factors = {}
+        cofactor = number
+        used = []
+        stale = []
+        for (text,) in self.db.execute("SELECT prime FROM primes").fetchall():
+            p = int(text)
+            if cofactor % p:
+                continue
+            if not rho.is_prime(p):
+                stale.append((text,))
+                continue
+            used.append(text)
+            while cofactor % p == 0:
+                factors[p] = factors.get(p, 0) + 1
+                cofactor //= p
+            if cofactor == 1:
+                break
+        if stale:
+            with self.db:
+                self.db.executemany("DELETE FROM primes WHERE prime = ?", stale)
+        if not used:
+            return None
+
+        if cofactor > 1:
+            rest = self.get(cofactor)
+            if rest is None and rho.is_prime(cofactor):
+                rest = {cofactor: 1}
+            if rest is None:
+                return None
+            for p, e in rest.items():
+                factors[p] = factors.get(p, 0) + e
+
+        with self.db:
+            self.db.executemany(
+                "UPDATE primes SET last_used = ? WHERE prime = ?",
+                [(time.time(), text) for text in used],
+            )
+        factors = dict(sorted(factors.items()))
+        self.put(number, factors)
+        return factors
+
+    def put(self, number, factors):
+        """Store {prime: exponent} for `number`, then evict beyond max_entries"""
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO factorizations VALUES (?, ?, ?)",
+                (str(number), json.dumps(sorted(factors.items())), now),
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO primes VALUES (?, ?)",
+                [(str(p), now) for p in factors],
+            )
+            for table in ("factorizations", "primes"):
+                self.db.execute(
+                    f"DELETE FROM {table} WHERE rowid IN ("
+                    f"SELECT rowid FROM {table} ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def close(self):
+        self.db.close()
+
+
+def verified(number, factors):
+    """True when `factors` multiply to `number` and every key is prime"""
+    product = 1
+    for p, e in factors.items():
+        if not rho.is_prime(p):
+            return False
+        product *= p**e
+    return product == number
+
+
+def open_cache(path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+    """One FactorCache per path and process, reused across calls (batch/server mode)"""
+    key = str(path)
+    if key not in _open:
+        _open[key] = FactorCache(path, max_entries)
+    _open[key].max_entries = max_entries
+    return _open[key]
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Client for the persistent factorization server (parallel.py --serve).
+
+Examples:
+    python3 client.py 34343434 --algorithm rho
+    python3 client.py 1099511627776 --repeat 200 --compare-launch 4
+    python3 client.py --shutdown
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import parallel
+import server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Send factorization requests to a running parallel.py --serve."
+    )
+    parser.add_argument("number", type=int, nargs="?", help="Integer to factor.")
+    parser.add_argument(
+        "--socket",
+        default=server.DEFAULT_SOCKET,
+        help=f"Server socket path (default: {server.DEFAULT_SOCKET}).",
+    )
+    # the server accepts exactly parallel.CHOICES
+    for option in ("algorithm", "kernel", "schedule", "mode"):
+        parser.add_argument(f"--{option}", choices=parallel.CHOICES[option])
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the server's factorization cache (otherwise repeats are cache hits).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Send the request this many times and report p50/p99 latency.",
+    )
+    parser.add_argument(
+        "--compare-launch",
+        type=int,
+        metavar="NPROC",
+        help="Also time one-shot `mpirun -n NPROC python3 parallel.py` launches for comparison.",
+    )
+    parser.add_argument(
+        "--shutdown", action="store_true", help="Ask the server to stop."
+    )
+    args = parser.parse_args()
+
+    if args.number is None and not args.shutdown:
+        parser.error("a number is required unless --shutdown is given")
+    return args
+
+
+def latency_summary(samples):
+    """p50/p99/mean of latency samples in seconds"""
+    samples = np.asarray(samples)
+    return {
+        "p50": float(np.percentile(samples, 50)),
+        "p99": float(np.percentile(samples, 99)),
+        "mean": float(samples.mean()),
+        "n": len(samples),
+    }
+
+
+def print_summary(label, summary):
+    print(
+        f"{label:<14} n={summary['n']:<5} p50={summary['p50'] * 1000:9.2f} ms  "
+        f"p99={summary['p99'] * 1000:9.2f} ms  mean={summary['mean'] * 1000:9.2f} ms"
+    )
+
+
+def time_launches(args, nproc):
+    command = ["mpirun", "-n", str(nproc), "python3", "parallel.py", str(args.number)]
+    for key in ("algorithm", "kernel", "schedule", "mode"):
+        if getattr(args, key):
+            command += [f"--{key}", getattr(args, key)]
+    if args.no_cache:
+        command.append("--no-cache")
+
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    args = parse_args()
+    sock, sock_file = server.connect(args.socket)
+
+    with sock, sock_file:
+        if args.shutdown:
+            print(json.dumps(server.request(sock_file, {"shutdown": True})))
+            return
+
+        payload = {"number": args.number}
+        for key in ("algorithm", "kernel", "schedule", "mode"):
+            if getattr(args, key):
+                payload[key] = getattr(args, key)
+        if args.no_cache:
+            payload["no_cache"] = True
+
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            reply = server.request(sock_file, payload)
+            samples.append(time.perf_counter() - start)
+
+    if "error" in reply:
+        print(f"Error: {reply['error']}", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(reply))
+    if args.repeat > 1 or args.compare_launch:
+        print()
+        print_summary("server", latency_summary(samples))
+    if args.compare_launch:
+        print_summary("mpirun launch", latency_summary(time_launches(args, args.compare_launch)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Buffer-based collection of per-rank factor arrays onto rank 0.
+
+pickle   comm.gather of the arrays + np.unique on root (the original path)
+gatherv  Gather of the per-rank counts, then one Gatherv of the int64 data into
+         a preallocated array on root
+tree     binomial-tree reduction with Send/Recv of raw buffers; each level
+         merges two neighbouring ranks, so root receives log2(P) messages
+         instead of P
+
+With `ordered=True` (the static split: disjoint, ascending rank ranges) the
+gathered data is already sorted and root only concatenates. Otherwise each
+rank's array is still sorted on its own, and the runs are merged with a
+stable sort (timsort merges presorted runs in linear passes).
+"""
+
+from mpi4py import MPI
+import numpy as np
+
+METHODS = ["gatherv", "tree", "pickle"]
+
+TAG_COUNT = 11
+TAG_DATA = 12
+
+
+def gather_pickle(comm, local, ordered=True, root=0):
+    gathered = comm.gather(local, root=root)
+    if comm.Get_rank() != root:
+        return None
+    return np.unique(np.concatenate(gathered))
+
+
+def gather_buffers(comm, local, ordered=True, root=0):
+    local = np.ascontiguousarray(local, dtype=np.int64)
+    rank = comm.Get_rank()
+
+    counts = np.empty(comm.Get_size(), dtype=np.int64) if rank == root else None
+    comm.Gather(np.array([local.size], dtype=np.int64), counts, root=root)
+
+    if rank != root:
+        comm.Gatherv(local, None, root=root)
+        return None
+
+    displs = np.zeros_like(counts)
+    np.cumsum(counts[:-1], out=displs[1:])
+    gathered = np.empty(int(counts.sum()), dtype=np.int64)
+    comm.Gatherv(local, [gathered, counts, displs, MPI.INT64_T], root=root)
+    return gathered if ordered else np.sort(gathered, kind="stable")
+
+
+def gather_tree(comm, local, ordered=True, root=0):
+    local = np.ascontiguousarray(local, dtype=np.int64)
+    size = comm.Get_size()
+    # relative rank so any root works; rank `root` becomes 0
+    me = (comm.Get_rank() - root) % size
+
+    step = 1
+    while step < size:
+        if me % (2 * step) == step:
+            parent = (me - step + root) % size
+            comm.Send(np.array([local.size], dtype=np.int64), dest=parent, tag=TAG_COUNT)
+            comm.Send(local, dest=parent, tag=TAG_DATA)
+            return None
+        if me % (2 * step) == 0 and me + step < size:
+            child = (me + step + root) % size
+            count = np.empty(1, dtype=np.int64)
+            comm.Recv(count, source=child, tag=TAG_COUNT)
+            incoming = np.empty(int(count[0]), dtype=np.int64)
+            comm.Recv(incoming, source=child, tag=TAG_DATA)
+            # the partner covers the higher ranks, so appending keeps the order
+            local = np.concatenate((local, incoming))
+            if not ordered:
+                local = np.sort(local, kind="stable")
+        step *= 2
+
+    return local
+
+
+GATHERERS = {
+    "pickle": gather_pickle,
+    "gatherv": gather_buffers,
+    "tree": gather_tree,
+}
+
+
+def gather_factors(comm, local, method="gatherv", ordered=True, wide=False):
+    """
+    Collect every rank's sorted factor array on rank 0 (None elsewhere).
+
+    `wide` must be True on every rank when hits may not fit in int64; the
+    typed-buffer methods cannot carry Python ints, so that case is pickled.
+    """
+    if wide:
+        method = "pickle"
+    return GATHERERS[method](comm, local, ordered)
@@ -0,0 +1,86 @@
+"""
+Divisor enumeration from a prime factorization
+"""
+
+import rho
+
+# trial division below this, rho above it
+TRIAL_BOUND = 1 << 12
+
+
+def strip_small_factors(n, bound=None):
+    """
+    Divide out every prime below `bound` (all of them when None) by trial division.
+
+    Returns ({prime: exponent}, cofactor). Each prime is divided out as soon as
+    it is found, so the search bound sqrt(cofactor) shrinks with it: 2^55
+    needs one candidate, not 2^27.5. A cofactor > 1 left after a full scan is
+    prime and is counted in the factors (cofactor 1); with a `bound` that
+    stopped the scan first it is returned unexamined.
+    """
+    factors = {}
+    if n < 2:
+        return factors, n
+
+    d = 2
+    while d * d <= n and (bound is None or d < bound):
+        while n % d == 0:
+            factors[d] = factors.get(d, 0) + 1
+            n //= d
+        d += 1 if d == 2 else 2
+    if n > 1 and d * d > n:
+        factors[n] = factors.get(n, 0) + 1
+        n = 1
+    return factors, n
+
+
+def trial_factorize(n):
+    """Prime factorization of n as {prime: exponent} by trial division alone"""
+    return strip_small_factors(n)[0]
+
+
+def factorize(n, split=rho.pollard_brent):
+    """
+    Prime factorization of n as {prime: exponent}.
+
+    Trial division takes the primes below TRIAL_BOUND; the cofactor, if any,
+    goes to rho.factorize, which returns a prime at once (Miller-Rabin) and
+    splits a composite with `split` (the MPI driver races rho walks across
+    ranks). A large prime or semiprime cofactor no longer costs a trial scan
+    to its square root.
+    """
+    factors, cofactor = strip_small_factors(n, TRIAL_BOUND)
+    for p, e in rho.factorize(cofactor, split=split).items():
+        factors[p] = factors.get(p, 0) + e
+    return dict(sorted(factors.items()))
+
+
+def divisors_from_factorization(factors):
+    """All divisors (including 1 and n) of the number with the given {prime: exponent}, sorted"""
+    divisors = [1]
+    for p, e in factors.items():
+        powers = [p**k for k in range(1, e + 1)]
+        divisors += [d * pk for d in divisors for pk in powers]
+    return sorted(divisors)
+
+
+def factorization_from_divisors(n, divisors):
+    """
+    {prime: exponent} of n from its divisors up to sqrt(n) (or all of them).
+
+    Walking the divisors in ascending order, each one that still divides the
+    cofactor is prime, since its smaller prime factors are already divided out;
+    whatever is left above sqrt(n) is a single prime.
+    """
+    factors = {}
+    if n < 2:
+        return factors
+    for d in sorted(divisors):
+        if d < 2:
+            continue
+        while n % d == 0:
+            factors[d] = factors.get(d, 0) + 1
+            n //= d
+    if n > 1:
+        factors[n] = factors.get(n, 0) + 1
+    return factors
@@ -0,0 +1,117 @@
+"""
+Importable factorization API: parallel.solve() without a command line.
+
+    from factorlib import factorize
+
+    result = factorize(1099511627776, algorithm="divisors")
+    result["prime_factors"]        # {2: 40}
+    result["divisors"]             # [1, 2, 4, ..., 1099511627776]
+    result["timings"]["phases"]    # {"compute": [...], "communication": [...], ...}
+
+    # inside an existing MPI program (collective: every rank of comm calls it)
+    result = factorize(n, algorithm="rho", comm=MPI.COMM_WORLD)
+
+backend="process"/"thread" runs a local pool of `workers` in this process;
+passing `comm` (or backend="mpi", which uses COMM_WORLD) runs on the ranks of
+that communicator, and then, as with parallel.solve, rank 0 gets the result and
+the other ranks None. Any other parallel.py option (kernel, schedule, mode,
+memory_mb, collect, portfolio, ...) can be given by its argparse name. The
+factorization cache is off unless `cache` is set to a path or True.
+"""
+
+import os
+import time
+
+import divisors
+import parallel
+import timing
+
+
+def options(**overrides):
+    """parallel.py's argument namespace with its defaults, updated and checked"""
+    args = parallel.build_parser().parse_args(["0"])
+    for key, value in overrides.items():
+        if not hasattr(args, key) or key in ("number", "input", "output", "serve", "timing"):
+            raise TypeError(f"factorize() got an unexpected option '{key}'")
+        allowed = parallel.CHOICES.get(key)
+        if allowed is not None and value not in allowed:
+            raise ValueError(f"{key} must be one of {allowed}")
+        setattr(args, key, value)
+
+    if isinstance(args.portfolio, str):
+        args.portfolio = [name.strip() for name in args.portfolio.split(",") if name.strip()]
+    if args.workers < 1:
+        raise ValueError("workers must be at least 1")
+    if args.mode != "all" and args.algorithm != "trial":
+        raise ValueError("mode smallest/is-prime needs algorithm 'trial'")
+    return args
+
+
+def factorize(
+    n,
+    backend="thread",
+    algorithm="trial",
+    workers=None,
+    comm=None,
+    cache=False,
+    **overrides,
+):
+    """
+    Factor `n` and return a structured result.
+
+    The dict holds number, algorithm, backend, workers, prime_factors
+    ({prime: exponent}, or None when an early-exit mode did not settle it),
+    divisors (every divisor, sorted, or None likewise), elapsed_ns (wall time
+    of the call), timings (per-rank seconds per phase, the parallel.py
+    --timing format) and whatever the algorithm reports besides (factors,
+    smallest_factor, balance, portfolio, cached, ...).
+    """
+    if backend == "mpi" and comm is None:
+        from mpi4py import MPI
+
+        comm = MPI.COMM_WORLD
+    if comm is not None:
+        backend = "mpi"
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be at least 1")
+    args = options(
+        backend=backend,
+        algorithm=algorithm,
+        workers=os.cpu_count() if workers is None else workers,
+        no_cache=not cache,
+        **overrides,
+    )
+    if cache and cache is not True:
+        args.cache = str(cache)
+
+    start = time.perf_counter_ns()
+    timing.enable(comm)
+    try:
+        result = parallel.solve(comm, n, args)
+        report = timing.report()
+    finally:
+        timing.disable()
+    elapsed_ns = time.perf_counter_ns() - start
+    if result is None:
+        return None
+
+    factors = parallel.factorization_of(result) if n >= 2 else {}
+    structured = {key: to_builtin(value) for key, value in result.items()}
+    structured.update(
+        backend=backend,
+        workers=comm.Get_size() if comm is not None else args.workers,
+        prime_factors=factors,
+        divisors=divisors.divisors_from_factorization(factors) if factors is not None else None,
+        elapsed_ns=elapsed_ns,
+        timings=report,
+    )
+    if n < 2:
+        structured["divisors"] = [1] if n == 1 else []
+    return structured
+
+
+def to_builtin(value):
+    """NumPy arrays and scalars in a solve() result as plain lists and ints"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
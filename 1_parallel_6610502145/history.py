@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Benchmark history store (SQLite) with regression detection.
+
+benchmark.py appends every measured configuration, keyed by git commit, host
+fingerprint, backend, case and method, together with its raw timed samples.
+
+    python3 history.py list
+    python3 history.py compare --baseline a1b2c3d [--candidate HEAD_COMMIT]
+    python3 history.py plot --case min --metric time_seconds
+
+`compare` flags a configuration when its median time grew by more than
+--threshold and a permutation test on the samples says the difference is
+significant at --alpha; it exits with status 1 if anything was flagged, so it
+can gate a change. Configurations with fewer than MIN_SAMPLES samples on
+either side are reported but never flagged.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+DEFAULT_PATH = "benchmark_history.sqlite"
+PERMUTATIONS = 10_000
+# the smallest exact p-value is 1 / C(2k, k): 0.05 at 3 + 3 samples, so
+# nothing could ever pass alpha = 0.05; 4 + 4 reaches 1/70
+MIN_SAMPLES = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    recorded_at TEXT NOT NULL,
+    git_commit TEXT NOT NULL,
+    host TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    case_label TEXT NOT NULL,
+    method TEXT NOT NULL,
+    sweep TEXT NOT NULL,
+    number TEXT NOT NULL,
+    num_processes INTEGER NOT NULL,
+    metrics TEXT NOT NULL,
+    samples TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (host, backend, case_label, method, git_commit);
+"""
+
+KEY = ("host", "backend", "case_label", "method", "sweep", "number", "num_processes")
+
+
+def git_commit():
+    """HEAD commit, with a -dirty suffix for uncommitted changes; 'unknown' outside git"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short=12", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def host_fingerprint():
+    """hostname plus a short hash of CPU model, CPU count and OS: same hardware, same key"""
+    model = platform.processor()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    model = line.partition(":")[2].strip()
+                    break
+    except OSError:
+        pass
+    parts = [model, str(os.cpu_count()), platform.system(), platform.machine()]
+    digest = hashlib.sha1("|".join(parts).encode()).hexdigest()[:8]
+    return f"{platform.node()}-{digest}"
+
+
+def connect(path=DEFAULT_PATH):
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def record(path, results, backend, case_label, method, sweep="strong", number=None, commit=None):
+    """
+    Append benchmark.py results (one dict per configuration) to the store.
+
+    Pass the commit taken before the benchmark started: the run itself rewrites
+    tracked graph files, which would otherwise mark the tree dirty.
+    """
+    commit = commit or git_commit()
+    host = host_fingerprint()
+    now = datetime.now().isoformat(timespec="seconds")
+    rows = []
+    for result in results:
+        metrics = {
+            key: value
+            for key, value in result.items()
+            if key not in ("samples", "number") and isinstance(value, (int, float))
+        }
+        rows.append(
+            (
+                now,
+                commit,
+                host,
+                backend,
+                case_label,
+                method,
+                sweep,
+                str(result.get("number", number)),
+                result["num_processes"],
+                json.dumps(metrics),
+                json.dumps(result.get("samples", [result["time_seconds"]])),
+            )
+        )
+    with connect(path) as db:
+        db.executemany(
+            "INSERT INTO runs (recorded_at, git_commit, host, backend, case_label, method, "
+            "sweep, number, num_processes, metrics, samples) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return commit
+
+
+def load(path, **filters):
+    """Every stored row as a dict, oldest first, optionally filtered by column value"""
+    query = "SELECT * FROM runs"
+    clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    params = [value for value in filters.values() if value is not None]
+    with connect(path) as db:
+        db.row_factory = sqlite3.Row
+        rows = db.execute(query + " ORDER BY id", params).fetchall()
+    return [
+        {**dict(row), "metrics": json.loads(row["metrics"]), "samples": json.loads(row["samples"])}
+        for row in rows
+    ]
+
+
+def commits_in_order(rows):
+    order = []
+    for row in rows:
+        if row["git_commit"] not in order:
+            order.append(row["git_commit"])
+    return order
+
+
+def resolve_commit(order, prefix):
+    matches = [commit for commit in order if commit.startswith(prefix)]
+    if not matches:
+        raise SystemExit(f"Error: no recorded runs for commit '{prefix}'")
+    # the most recent commit wins when a prefix is ambiguous
+    return matches[-1]
+
+
+def mann_whitney_u(baseline, candidate):
+    """Pairs (b, c) with c > b, ties counting one half"""
+    diff = np.subtract.outer(candidate, baseline)
+    return np.count_nonzero(diff > 0) + 0.5 * np.count_nonzero(diff == 0)
+
+
+def permutation_pvalue(baseline, candidate, permutations=PERMUTATIONS):
+    """
+    One-sided p-value that the candidate times are not larger than the baseline times.
+
+    A permutation test on the Mann-Whitney U statistic, exact when the pooled
+    samples have at most `permutations` ways to split (every split is tried
+    once) and a seeded random sample of splits otherwise. Fully separated
+    samples give 1 / C(n + m, n), e.g. 1/20 at 3 + 3.
+    """
+    baseline = np.asarray(baseline, dtype=float)
+    candidate = np.asarray(candidate, dtype=float)
+    observed = mann_whitney_u(baseline, candidate)
+    pooled = np.concatenate((baseline, candidate))
+
+    if comb(pooled.size, baseline.size) <= permutations:
+        hits = total = 0
+        for picked in combinations(range(pooled.size), baseline.size):
+            mask = np.zeros(pooled.size, dtype=bool)
+            mask[list(picked)] = True
+            hits += mann_whitney_u(pooled[mask], pooled[~mask]) >= observed
+            total += 1
+        return hits / total
+
+    rng = np.random.default_rng(0)
+    hits = 0
+    for _ in range(permutations):
+        rng.shuffle(pooled)
+        hits += mann_whitney_u(pooled[: baseline.size], pooled[baseline.size :]) >= observed
+    return (hits + 1) / (permutations + 1)
+
+
+def compare(path, baseline=None, candidate=None, threshold=0.05, alpha=0.05, **filters):
+    """
+    Regressions of `candidate` against `baseline` (commit prefixes).
+
+    The candidate defaults to the most recently recorded commit and the baseline
+    to the one recorded before it. Returns (baseline, candidate, report) where
+    report has one dict per configuration measured under both commits, with a
+    "regression" flag; p_value is None when either side has fewer than
+    MIN_SAMPLES samples.
+    """
+    rows = load(path, **filters)
+    order = commits_in_order(rows)
+    if len(order) < 2 and baseline is None:
+        raise SystemExit("Error: need runs from at least two commits to compare")
+    candidate = resolve_commit(order, candidate) if candidate else order[-1]
+    if baseline:
+        baseline = resolve_commit(order, baseline)
+    else:
+        earlier = order[: order.index(candidate)]
+        if not earlier:
+            raise SystemExit(f"Error: no commit recorded before {candidate}")
+        baseline = earlier[-1]
+
+    latest = {}
+    for row in rows:
+        if row["git_commit"] in (baseline, candidate):
+            # a later run of the same configuration and commit replaces an earlier one
+            latest[(row["git_commit"],) + tuple(row[key] for key in KEY)] = row
+
+    report = []
+    for key, base in latest.items():
+        if key[0] != baseline:
+            continue
+        cand = latest.get((candidate,) + key[1:])
+        if cand is None:
+            continue
+        base_median = float(np.median(base["samples"]))
+        cand_median = float(np.median(cand["samples"]))
+        ratio = cand_median / base_median if base_median else float("inf")
+        p_value = None
+        if min(len(base["samples"]), len(cand["samples"])) >= MIN_SAMPLES:
+            p_value = permutation_pvalue(base["samples"], cand["samples"])
+        report.append(
+            {
+                **{name: base[name] for name in KEY},
+                "baseline_median": base_median,
+                "candidate_median": cand_median,
+                "ratio": ratio,
+                "p_value": p_value,
+                "regression": ratio > 1 + threshold and p_value is not None and p_value < alpha,
+            }
+        )
+    return baseline, candidate, report
+
+
+def plot_history(path, metric, output, **filters):
+    """Plot `metric` across recorded commits, one line per configuration"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rows = load(path, **filters)
+    if not rows:
+        raise SystemExit("Error: no recorded runs match the filters")
+    order = commits_in_order(rows)
+
+    series = {}
+    for row in rows:
+        value = row["metrics"].get(metric)
+        if value is None:
+            continue
+        label = f"{row['case_label']} {row['backend']} {row['method']} N={row['num_processes']}"
+        series.setdefault(label, {})[order.index(row["git_commit"])] = value
+
+    fig, ax = plt.subplots(figsize=(max(8, len(order) * 0.8), 5))
+    for label, points in sorted(series.items()):
+        xs = sorted(points)
+        ax.plot(xs, [points[x] for x in xs], marker="o", linewidth=2, label=label)
+    ax.set_xticks(range(len(order)))
+    ax.set_xticklabels([commit[:9] for commit in order], rotation=45, ha="right")
+    ax.set_xlabel("Commit (recording order)", fontweight="bold")
+    ax.set_ylabel(metric, fontweight="bold")
+    ax.set_title(f"{metric} across history", fontweight="bold", pad=15)
+    ax.grid(True, alpha=0.3, linestyle="--")
+    if len(series) <= 12:
+        ax.legend(fontsize=8)
+    plt.tight_layout()
+    plt.savefig(output, bbox_inches="tight")
+    plt.close()
+    print(f"✓ Saved: {output}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query the benchmark history store.")
+    parser.add_argument(
+        "--db", default=DEFAULT_PATH, help=f"History database (default: {DEFAULT_PATH})."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_filters(p):
+        p.add_argument("--case", help="Only this case label (e.g. min, max, big).")
+        p.add_argument("--backend", help="Only this backend.")
+        p.add_argument("--method", help="Only this method (e.g. loop_static, rho).")
+        p.add_argument("--host", help="Only this host fingerprint (default: every host).")
+
+    add_filters(sub.add_parser("list", help="Summarize recorded commits and configurations."))
+
+    cmp = sub.add_parser("compare", help="Flag significant slowdowns; exit 1 on regression.")
+    cmp.add_argument("--baseline", help="Baseline commit prefix (default: the one before the candidate).")
+    cmp.add_argument("--candidate", help="Candidate commit prefix (default: the latest recorded).")
+    cmp.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="Smallest median slowdown that counts, as a fraction (default: 0.05).",
+    )
+    cmp.add_argument(
+        "--alpha", type=float, default=0.05, help="Significance level (default: 0.05)."
+    )
+    add_filters(cmp)
+
+    plot = sub.add_parser("plot", help="Plot one metric across recorded commits.")
+    plot.add_argument("--metric", default="time_seconds", help="Any CSV column (default: time_seconds).")
+    plot.add_argument("--num-processes", type=int, help="Only this process count.")
+    plot.add_argument("--output", default="history.png", help="Output image (default: history.png).")
+    add_filters(plot)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    filters = {
+        "case_label": args.case,
+        "backend": args.backend,
+        "method": args.method,
+        "host": args.host,
+    }
+
+    if args.command == "list":
+        rows = load(args.db, **filters)
+        for commit in commits_in_order(rows):
+            mine = [row for row in rows if row["git_commit"] == commit]
+            configs = sorted({(row["case_label"], row["backend"], row["method"]) for row in mine})
+            print(
+                f"{commit:<18} {mine[-1]['recorded_at']}  {len(mine):>4} rows  "
+                + ", ".join("/".join(config) for config in configs)
+            )
+        return
+
+    if args.command == "plot":
+        plot_history(
+            args.db, args.metric, args.output, num_processes=args.num_processes, **filters
+        )
+        return
+
+    baseline, candidate, report = compare(
+        args.db, args.baseline, args.candidate, args.threshold, args.alpha, **filters
+    )
+    print(f"Baseline {baseline}  vs  candidate {candidate}\n")
+    if not report:
+        print("No configuration was measured under both commits.")
+        return
+    for row in report:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        p_value = "n/a" if row["p_value"] is None else f"{row['p_value']:.3f}"
+        print(
+            f"{flag:<10} {row['case_label']:<5} {row['backend']:<8} {row['method']:<14} "
+            f"N={row['num_processes']:<4} {row['baseline_median']:.3f}s -> "
+            f"{row['candidate_median']:.3f}s ({(row['ratio'] - 1) * 100:+.1f}%, p={p_value})"
+        )
+    untested = sum(row["p_value"] is None for row in report)
+    if untested:
+        print(
+            f"\nWarning: {untested} configuration(s) have fewer than {MIN_SAMPLES} samples "
+            "on a side and cannot be flagged; rerun benchmark.py with --min-repeat "
+            f"{MIN_SAMPLES} or more.",
+            file=sys.stderr,
+        )
+    regressions = sum(row["regression"] for row in report)
+    print(f"\n{regressions} regression(s) in {len(report)} configuration(s)")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Vectorized small-prime elimination for many small integers at once.
+
+    python3 multifactor.py numbers.npy --output factors.jsonl
+    seq 2 1000000 | python3 multifactor.py - --bound 4096
+
+Calling factor() once per number spends nearly all its time in interpreter
+overhead. Here a whole array is tested against a block of primes with one
+broadcast modulo (numbers x primes), every hit is divided out with
+np.floor_divide.at (unbuffered, so a number hit by several primes of the block
+is divided by each of them), and rows whose cofactor drops below the square of
+the next prime are retired: that cofactor is 1 or prime. The arithmetic runs in
+uint32 whenever every active cofactor fits, which halves the cost of the
+modulo. With the default bound 2^16 every input below 2^32 is factored
+completely in the array pass; only the larger cofactors go to rho.factorize.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+import batch
+import primes
+import rho
+
+DEFAULT_BOUND = 1 << 16
+DEFAULT_MEMORY_MB = 64
+DEFAULT_CHUNK_SIZE = 1 << 16
+PRIME_BLOCK = 64
+UINT32_MAX = 2**32 - 1
+
+
+def eliminate_small_primes(numbers, bound=DEFAULT_BOUND, memory_mb=DEFAULT_MEMORY_MB):
+    """
+    Divide every prime below `bound` out of an array of integers in [0, 2^63).
+
+    Returns (rows, factors, cofactors): factors[k] is a prime dividing
+    numbers[rows[k]], repeated once per multiplicity and sorted by row then
+    prime, and cofactors[i] is what remains of numbers[i]. A cofactor below
+    bound^2 is 1 or prime; only larger ones may still be composite.
+    """
+    cofactors = np.array(numbers, dtype=np.int64).reshape(-1)
+    if cofactors.size and cofactors.min() < 0:
+        raise ValueError("numbers must be non-negative")
+    table = primes.simple_sieve(bound)
+    hit_rows = []
+    hit_primes = []
+
+    # 0 and 1 have no prime factors to find
+    active = np.flatnonzero(cofactors > 1)
+    for lo in range(0, table.size, PRIME_BLOCK):
+        block = table[lo : lo + PRIME_BLOCK]
+        # a cofactor below p^2 for the smallest p left is 1 or prime
+        active = active[cofactors[active] >= block[0] * block[0]]
+        if active.size == 0:
+            break
+
+        dtype = np.uint32 if cofactors[active].max() <= UINT32_MAX else np.int64
+        block_t = block.astype(dtype)
+        # rows per pass within the memory budget (remainder + mask per cell)
+        rows_per_pass = max(1, int(memory_mb * 1024 * 1024) // (block.size * 9))
+        for start in range(0, active.size, rows_per_pass):
+            rows = active[start : start + rows_per_pass]
+            values = cofactors[rows].astype(dtype)
+            hit = np.remainder(values[:, None], block_t[None, :]) == 0
+            r, c = np.nonzero(hit)
+            r = rows[r]
+            p = block[c]
+            while r.size:
+                np.floor_divide.at(cofactors, r, p)
+                hit_rows.append(r)
+                hit_primes.append(p)
+                again = cofactors[r] % p == 0
+                r, p = r[again], p[again]
+
+    if not hit_rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), cofactors
+    rows = np.concatenate(hit_rows)
+    factors = np.concatenate(hit_primes)
+    order = np.lexsort((factors, rows))
+    return rows[order], factors[order], cofactors
+
+
+def factorize_many(numbers, bound=DEFAULT_BOUND, memory_mb=DEFAULT_MEMORY_MB):
+    """
+    Prime factorization of every number, as a list of {prime: exponent}.
+
+    Numbers below 2^63 go through eliminate_small_primes(); a cofactor that is
+    not settled by the bound, and any wider number, is finished by
+    rho.factorize one at a time.
+    """
+    numbers = [int(n) for n in numbers]
+    results = [{} for _ in numbers]
+    narrow = [i for i, n in enumerate(numbers) if 0 <= n <= np.iinfo(np.int64).max]
+    wide = [i for i, n in enumerate(numbers) if not 0 <= n <= np.iinfo(np.int64).max]
+
+    if narrow:
+        rows, factors, cofactors = eliminate_small_primes(
+            [numbers[i] for i in narrow], bound, memory_mb
+        )
+        # rows/factors are sorted, so each (row, prime) run length is its exponent
+        if rows.size:
+            starts = np.flatnonzero(np.diff(rows, prepend=-1) | np.diff(factors, prepend=-1))
+            exponents = np.diff(starts, append=rows.size)
+            for row, p, e in zip(rows[starts].tolist(), factors[starts].tolist(), exponents.tolist()):
+                results[narrow[row]][p] = e
+        settled = bound * bound
+        left = np.flatnonzero(cofactors > 1)
+        for row, cofactor in zip(left.tolist(), cofactors[left].tolist()):
+            result = results[narrow[row]]
+            rest = {cofactor: 1} if cofactor < settled else rho.factorize(cofactor)
+            for p, e in rest.items():
+                result[p] = result.get(p, 0) + e
+
+    for i in wide:
+        results[i] = rho.factorize(numbers[i])
+    return [dict(sorted(result.items())) for result in results]
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lists of integers from a .npy array (memory-mapped) or batch-mode text ('-' for stdin)"""
+    if str(path).endswith(".npy"):
+        array = np.load(path, mmap_mode="r")
+        for lo in range(0, array.size, chunk_size):
+            yield array.reshape(-1)[lo : lo + chunk_size].tolist()
+        return
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    chunk = []
+    for number in batch.read_numbers(source):
+        chunk.append(number)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+    if source is not sys.stdin:
+        source.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Factor many small integers with one vectorized small-prime pass per chunk."
+    )
+    parser.add_argument("input", help="A .npy integer array, or text (batch-mode format, '-' for stdin).")
+    parser.add_argument(
+        "--output", default="-", help="JSON Lines output file, or '-' for stdout (default: -)."
+    )
+    parser.add_argument(
+        "--bound",
+        type=int,
+        default=DEFAULT_BOUND,
+        help=f"Divide out every prime below this in the array pass (default: {DEFAULT_BOUND}).",
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=float,
+        default=DEFAULT_MEMORY_MB,
+        help=f"Budget for one numbers x primes block (default: {DEFAULT_MEMORY_MB}).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Numbers read and factored per pass (default: {DEFAULT_CHUNK_SIZE}).",
+    )
+    args = parser.parse_args()
+    if args.bound < 2:
+        parser.error("--bound must be at least 2")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    return args
+
+
+def main():
+    args = parse_args()
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    for chunk in read_chunks(args.input, args.chunk_size):
+        for number, factors in zip(chunk, factorize_many(chunk, args.bound, args.memory_mb)):
+            batch.write_record(out, {"number": number, "prime_factors": factors})
+    if out is not sys.stdout:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,37 @@
-from calendar import c
-from linecache import cache
-from mpi4py import MPI
-from sys import argv
-from math import sqrt
+import time
+
+# taken before the heavy imports so --timing can report the startup phase
+T_START = time.perf_counter()
+
+import argparse
+import functools
+import os
+import random
+from math import isqrt
 import numpy as np
-from numpy._typing import DTypeLike
+
+import backends
+import batch
+import bigint
+import cache
+import divisors
+import portfolio
+import primes
+import rho
+import server
+import timing
+
+# bytes held per candidate in one block: candidate (int64) + remainder (int64) + mask (bool)
+BYTES_PER_CANDIDATE = 17
+DEFAULT_MEMORY_MB = 64
+# candidates per early-exit block (--mode smallest/is-prime): small so cancellation is prompt
+SEARCH_BLOCK = 1 << 16
 
 
 def factor(num, start, end):
-    # init value
-    factor_list = np.zeros(0, dtype=int)
+    # init value (object dtype once candidates no longer fit in int64)
+    factor_list = np.zeros(0, dtype=int if end - 1 <= bigint.INT64_MAX else object)
+    num = bigint.fast_int(num)
     for i in range(start, end):
         if num % i == 0:
             factor_list = np.append(factor_list, i)
@@ -17,27 +39,633 @@ def factor(num, start, end):
     return factor_list
 
 
+def block_size_for(memory_mb):
+    """Number of candidates per block that fits in the per-rank memory budget"""
+    return max(1, int(memory_mb * 1024 * 1024) // BYTES_PER_CANDIDATE)
+
+
+def factor_vectorized(num, start, end, memory_mb=DEFAULT_MEMORY_MB):
+    """
+    Trial-divide [start, end) in fixed-size NumPy blocks.
+
+    Every block reuses the same candidate/remainder/mask buffers, and hits are
+    written into one preallocated buffer that only grows (by doubling) when full.
+    A num wider than int64 is reduced limb by limb (bigint.mod_limbs); only
+    candidates too wide for that fall back to object arrays.
+    """
+    total = max(0, end - start)
+    block = min(block_size_for(memory_mb), total) or 1
+
+    limbs = None
+    if num > bigint.INT64_MAX:
+        shift = bigint.limb_shift(end - 1)
+        if shift is None:
+            return factor_object(num, start, end, block)
+        limbs = bigint.to_limbs(num, shift)
+
+    offsets = np.arange(block, dtype=np.int64)
+    candidates = np.empty(block, dtype=np.int64)
+    remainders = np.empty(block, dtype=np.int64)
+    mask = np.empty(block, dtype=bool)
+
+    hits = np.empty(min(total, 1024) or 1, dtype=np.int64)
+    count = 0
+
+    for lo in range(start, end, block):
+        n = min(block, end - lo)
+        cand = candidates[:n]
+        rem = remainders[:n]
+        hit = mask[:n]
+
+        np.add(offsets[:n], lo, out=cand)
+        if limbs is None:
+            np.remainder(num, cand, out=rem)
+        else:
+            bigint.mod_limbs(limbs, shift, cand, rem)
+        np.equal(rem, 0, out=hit)
+
+        found = cand[hit]
+        if found.size == 0:
+            continue
+        if count + found.size > hits.size:
+            hits = np.resize(hits, max(hits.size * 2, count + found.size))
+        hits[count : count + found.size] = found
+        count += found.size
+
+    return hits[:count]
+
+
+def factor_object(num, start, end, block):
+    """Exact block kernel on Python-int object arrays, for candidates wider than the limb kernel allows"""
+    num = bigint.fast_int(num)
+    hits = []
+    for lo in range(start, end, block):
+        cand = np.array(range(lo, min(end, lo + block)), dtype=object)
+        hits.extend(cand[num % cand == 0])
+    return np.array(hits, dtype=object)
+
+
+def factor_loop(num, start, end, memory_mb=DEFAULT_MEMORY_MB):
+    """factor() with the common kernel signature (the memory budget is unused)"""
+    return factor(num, start, end)
+
+
+KERNELS = {
+    "loop": factor_loop,
+    "vectorized": factor_vectorized,
+}
+
+
+def rho_splitter(comm, batch=rho.DEFAULT_BATCH):
+    """
+    Build a `split(n)` for rho.factorize that races one Brent walk per rank.
+
+    Each rank walks with its own seed; after every batch the ranks allgather
+    what they found and all adopt the factor from the lowest rank that has one,
+    so every rank stops in the same round and keeps an identical work stack.
+    """
+    rank = comm.Get_rank()
+    rng = random.Random(rank)
+
+    def split(n):
+        walk = rho.brent_walk(n, rng, batch)
+        found = 0
+        while True:
+            if not found:
+                try:
+                    next(walk)
+                except StopIteration as stop:
+                    found = stop.value
+            for d in comm.allgather(found):
+                if d:
+                    return d
+
+    return split
+
+
+ALGORITHMS = ["trial", "rho", "divisors", "primes", "portfolio"]
+# allowed values of the options a server request or a factorlib call may set
+CHOICES = {
+    "algorithm": ALGORITHMS,
+    "backend": backends.BACKENDS,
+    "kernel": list(KERNELS.keys()),
+    "schedule": ["static", "dynamic"],
+    "collect": ["gatherv", "tree", "pickle"],
+    "mode": ["all", "smallest", "is-prime"],
+    "no_cache": [True, False],
+}
+
+
+def build_parser():
+    """The parallel.py command line; its defaults are the defaults of factorlib.factorize too"""
+    parser = argparse.ArgumentParser(
+        description="Find factors of an integer in parallel with MPI."
+    )
+    parser.add_argument(
+        "number", type=int, nargs="?", help="Integer to factor (omit with --input)."
+    )
+    parser.add_argument(
+        "--algorithm",
+        choices=ALGORITHMS,
+        default="trial",
+        help=(
+            "trial: divisors up to sqrt(n); rho: prime factorization with Pollard-Brent rho; "
+            "divisors: every divisor generated from the prime factorization; "
+            "primes: prime factorization dividing only by a memory-mapped prime table; "
+            "portfolio: prime factorization racing --portfolio strategies across rank groups (default: trial)."
+        ),
+    )
+    parser.add_argument(
+        "--mode",
+        choices=CHOICES["mode"],
+        default="all",
+        help=(
+            "trial only. all: every factor up to sqrt(n); smallest: stop at the smallest "
+            "nontrivial factor; is-prime: primality by the same early-exit scan (default: all)."
+        ),
+    )
+    parser.add_argument(
+        "--backend",
+        choices=backends.BACKENDS,
+        default="mpi",
+        help=(
+            "mpi: ranks launched by mpirun; process/thread: a local pool of --workers "
+            "without MPI (default: mpi)."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Pool size for the process/thread backends (default: CPU count).",
+    )
+    parser.add_argument(
+        "--kernel",
+        choices=list(KERNELS.keys()),
+        default="loop",
+        help="Trial-division kernel used by every rank (default: loop).",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=CHOICES["schedule"],
+        default="static",
+        help=(
+            "static: one equal block per rank; dynamic: rank 0 hands out "
+            "throughput-sized chunks on demand (default: static)."
+        ),
+    )
+    parser.add_argument(
+        "--collect",
+        choices=CHOICES["collect"],
+        default="gatherv",
+        help=(
+            "How rank 0 collects the factors: gatherv (typed Gatherv into one array), "
+            "tree (binomial-tree merge) or pickle (gather + unique) (default: gatherv)."
+        ),
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=float,
+        default=DEFAULT_MEMORY_MB,
+        help=f"Per-rank memory budget for the vectorized kernel (default: {DEFAULT_MEMORY_MB}).",
+    )
+    parser.add_argument(
+        "--prime-bound",
+        type=int,
+        default=primes.DEFAULT_BOUND,
+        help=f"--algorithm primes: table holds every prime below this (default: {primes.DEFAULT_BOUND}).",
+    )
+    parser.add_argument(
+        "--prime-table",
+        help="--algorithm primes: table path, built on first use (default: prime_table_<bound>.npy).",
+    )
+    parser.add_argument(
+        "--portfolio",
+        default=",".join(portfolio.STRATEGIES),
+        help=(
+            "--algorithm portfolio: comma-separated strategies, one rank group each "
+            f"(from {', '.join(portfolio.STRATEGIES)}; default: all of them)."
+        ),
+    )
+    parser.add_argument(
+        "--cache",
+        default=cache.DEFAULT_PATH,
+        help=f"SQLite file of known factorizations, checked before any work is distributed (default: {cache.DEFAULT_PATH}).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the cache (benchmark.py always passes this).",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=cache.DEFAULT_MAX_ENTRIES,
+        help=f"Least recently used entries beyond this are evicted (default: {cache.DEFAULT_MAX_ENTRIES}).",
+    )
+    parser.add_argument(
+        "--timing",
+        metavar="PATH",
+        help=(
+            "Write per-rank seconds for the startup, compute, communication and output "
+            "phases as JSON to PATH ('-' for stdout); adds barriers between phases."
+        ),
+    )
+    parser.add_argument(
+        "--input",
+        help="Batch mode: file of integers (one or more per line, '#' comments), or '-' for stdin.",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="Batch mode: JSON Lines output file, or '-' for stdout (default: -).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=batch.DEFAULT_BATCH_SIZE,
+        help=f"Batch mode: numbers read per round (default: {batch.DEFAULT_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--split-threshold",
+        type=int,
+        default=batch.DEFAULT_SPLIT_THRESHOLD,
+        help=(
+            "Batch mode: numbers whose estimated work exceeds this many candidates are "
+            f"split across all ranks; smaller ones run whole on one rank (default: {batch.DEFAULT_SPLIT_THRESHOLD})."
+        ),
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        const=server.DEFAULT_SOCKET,
+        metavar="SOCKET",
+        help=f"Server mode: keep the ranks up and take requests on a Unix socket (default: {server.DEFAULT_SOCKET}).",
+    )
+    return parser
+
+
+def parse_args():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    modes = [args.number is not None, args.input is not None, args.serve is not None]
+    if sum(modes) != 1:
+        parser.error("exactly one of NUMBER, --input or --serve is required")
+    if args.backend != "mpi" and args.number is None:
+        parser.error("--input and --serve need --backend mpi")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.mode != "all" and args.algorithm != "trial":
+        parser.error("--mode smallest/is-prime needs --algorithm trial")
+    if args.timing is not None and args.number is None:
+        parser.error("--timing needs a single NUMBER")
+    args.portfolio = [name.strip() for name in args.portfolio.split(",") if name.strip()]
+    unknown = sorted(set(args.portfolio) - set(portfolio.STRATEGIES))
+    if unknown or not args.portfolio:
+        parser.error(f"--portfolio takes strategies from {', '.join(portfolio.STRATEGIES)}")
+    if args.cache_max_entries < 1:
+        parser.error("--cache-max-entries must be at least 1")
+    return args
+
+
+def solve(comm, number, args):
+    """
+    Factor `number` collectively on `comm` with the algorithm chosen in `args`.
+
+    Returns the result dict on rank 0 of `comm` and None on the other ranks.
+    Passing MPI.COMM_SELF factors the number whole on the calling rank; with
+    comm=None the process/thread backend in `args` runs it without MPI.
+
+    Unless args.no_cache is set, rank 0 first looks the number up in the
+    factorization cache and broadcasts the outcome, so on a hit no rank does
+    any work; every fully factored result is stored afterwards.
+    """
+    rank = comm.Get_rank() if comm is not None else 0
+    store = None
+    if not getattr(args, "no_cache", True) and rank == 0:
+        store = cache.open_cache(args.cache, args.cache_max_entries)
+
+    with timing.phase("communication"):
+        known = store.resolve(number) if store is not None else None
+        if comm is not None:
+            known = comm.bcast(known, root=0)
+    if known is not None:
+        return result_from_factorization(number, known, args) if rank == 0 else None
+
+    result = solve_uncached(comm, number, args)
+    if store is not None and number >= 2:
+        factors = factorization_of(result)
+        if factors is not None:
+            store.put(number, factors)
+    return result
+
+
+def factorization_of(result):
+    """{prime: exponent} behind a solve() result, or None when the result does not determine it"""
+    if "mode" in result:
+        # an early-exit scan settles the factorization only when it finds none
+        return {result["number"]: 1} if result["is_prime"] else None
+    if "prime_factors" in result:
+        return result["prime_factors"]
+    if "divisors" in result:
+        return divisors.factorization_from_divisors(result["number"], result["divisors"].tolist())
+    # every divisor up to sqrt(n) is enough to recover the factorization
+    return divisors.factorization_from_divisors(result["number"], result["factors"].tolist())
+
+
+def result_from_factorization(number, factors, args):
+    """The result solve() would return for `args`, built from a cached factorization"""
+    result = {"number": number, "algorithm": args.algorithm, "cached": True}
+    if args.algorithm in ("rho", "primes", "portfolio"):
+        result["prime_factors"] = factors
+        return result
+
+    all_divisors = divisors.divisors_from_factorization(factors)
+    if args.algorithm == "divisors":
+        result["divisors"] = np.array(all_divisors)
+        return result
+
+    root = isqrt(number)
+    if getattr(args, "mode", "all") != "all":
+        smallest = min(factors) if min(factors) <= root else None
+        result["mode"] = args.mode
+        result["smallest_factor"] = smallest
+        result["is_prime"] = smallest is None
+        result["time_to_first_seconds"] = 0.0
+        result["total_seconds"] = 0.0
+        return result
+
+    result["factors"] = np.array(
+        [d for d in all_divisors if 2 <= d <= root],
+        dtype=np.int64 if root <= bigint.INT64_MAX else object,
+    )
+    return result
+
+
+def solve_uncached(comm, number, args):
+    """solve() without the cache lookup: always runs the chosen algorithm"""
+    rank = comm.Get_rank() if comm is not None else 0
+    size = comm.Get_size() if comm is not None else 1
+    result = {"number": number, "algorithm": args.algorithm}
+
+    if args.algorithm == "rho":
+        split = rho_splitter(comm) if comm is not None else rho.pollard_brent
+        with timing.phase("compute"):
+            factors = rho.factorize(number, split=split)
+        if rank != 0:
+            return None
+        result["prime_factors"] = factors
+        return result
+
+    if args.algorithm == "portfolio":
+        with timing.phase("compute"):
+            factors, wins = portfolio.factorize(
+                comm, number, args.portfolio, factor_vectorized, args.memory_mb
+            )
+        if rank != 0:
+            return None
+        result["prime_factors"] = factors
+        result["portfolio"] = wins
+        return result
+
+    if args.algorithm == "divisors":
+        # small primes by trial division, the cofactor split by rho walks raced across ranks
+        split = rho_splitter(comm) if comm is not None else rho.pollard_brent
+        with timing.phase("compute"):
+            factors = divisors.factorize(number, split=split)
+            if rank == 0:
+                result["divisors"] = np.array(divisors.divisors_from_factorization(factors))
+        return result if rank == 0 else None
+
+    if args.algorithm == "primes":
+        factors = solve_primes(comm, number, args)
+        if rank != 0:
+            return None
+        result["prime_factors"] = factors
+        return result
+
+    limit = isqrt(number) + 1
+    kernel = KERNELS[args.kernel]
+
+    if getattr(args, "mode", "all") != "all":
+        with timing.phase("compute"):
+            return solve_smallest(comm, number, args, kernel, limit, result)
+
+    if comm is None:
+        # static: one block per worker; dynamic: 8 blocks per worker, handed out by the pool
+        tasks = args.workers if args.schedule == "static" else args.workers * 8
+        with timing.phase("compute"):
+            result["factors"] = backends.run_local(
+                args.backend, kernel, number, 2, limit, args.workers, args.memory_mb, tasks
+            )
+        return result
+
+    if args.schedule == "dynamic":
+        # only the MPI path needs mpi4py, so the scheduler is imported on demand
+        import scheduler
+
+        # chunk requests are part of the scheduling itself, so they count as compute
+        with timing.phase("compute"):
+            local_factors, stats = scheduler.dynamic_factor(
+                comm, kernel, number, 2, limit, args.memory_mb
+            )
+    else:
+        # split side for process
+        chunk = limit // size
+        start = rank * chunk + 2
+        end = (rank + 1) * chunk + 2 if rank != size - 1 else limit
+
+        with timing.phase("compute"):
+            local_factors = kernel(number, start, end, args.memory_mb)
+        stats = None
+
+    import collect
+
+    with timing.phase("communication"):
+        all_stats = comm.gather(stats, root=0) if stats is not None else None
+        # รวม array ทั้งหมดเป็นอันเดียว (static ranges are disjoint and ascending, so no re-sort)
+        all_factors = collect.gather_factors(
+            comm,
+            local_factors,
+            args.collect,
+            ordered=args.schedule == "static",
+            wide=limit - 1 > bigint.INT64_MAX,
+        )
+    if rank != 0:
+        return None
+
+    result["factors"] = all_factors
+    if all_stats is not None:
+        result["balance"] = all_stats
+    return result
+
+
+def solve_smallest(comm, number, args, kernel, limit, result):
+    """
+    --mode smallest / is-prime: scan upward and stop at the first factor.
+
+    Returns the result dict on rank 0 and None elsewhere, with the time to the
+    winning factor reported apart from the total runtime.
+    """
+    block = min(block_size_for(args.memory_mb), SEARCH_BLOCK)
+    if comm is None:
+        factor_found, t_first, total = backends.smallest_local(
+            args.backend, kernel, number, 2, limit, args.workers, args.memory_mb, block
+        )
+    else:
+        import search
+
+        factor_found, t_first, total = search.smallest_factor(
+            comm, kernel, number, 2, limit, args.memory_mb, block
+        )
+        if comm.Get_rank() != 0:
+            return None
+
+    result["mode"] = args.mode
+    result["smallest_factor"] = factor_found
+    result["is_prime"] = number >= 2 and factor_found is None
+    result["time_to_first_seconds"] = t_first
+    result["total_seconds"] = total
+    return result
+
+
+def solve_primes(comm, number, args):
+    """
+    Prime factorization by trial division over the prime table only.
+
+    Every rank (or pool worker) tests its own slice of the primes <= sqrt(n)
+    against the mapped table; rank 0 then divides the hits out. If sqrt(n) lies
+    beyond the table, the remaining cofactor is finished with Pollard rho.
+    Returns the factorization on rank 0 and None elsewhere.
+    """
+    rank = comm.Get_rank() if comm is not None else 0
+    size = comm.Get_size() if comm is not None else 1
+
+    path = primes.ensure_table(args.prime_bound, args.prime_table, comm)
+    count = primes.prime_count_upto(primes.load_table(path), isqrt(max(number, 0)))
+    kernel = functools.partial(primes.divide_by_primes, path)
+
+    if comm is None:
+        with timing.phase("compute"):
+            hits = backends.run_local(
+                args.backend, kernel, number, 0, count, args.workers, args.memory_mb
+            )
+    else:
+        chunk = count // size
+        start = rank * chunk
+        end = (rank + 1) * chunk if rank != size - 1 else count
+        import collect
+
+        with timing.phase("compute"):
+            local = kernel(number, start, end, args.memory_mb)
+        with timing.phase("communication"):
+            # table entries always fit in int64, and rank slices are ascending
+            hits = collect.gather_factors(comm, local, args.collect)
+        if rank != 0:
+            return None
+
+    factors = {}
+    cofactor = number
+    for p in hits.tolist():
+        while cofactor % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            cofactor //= p
+    # rank 0 alone finishes the cofactor, so there is no barrier around it
+    for p, e in rho.factorize(cofactor).items():
+        factors[p] = factors.get(p, 0) + e
+    return dict(sorted(factors.items()))
+
+
+def format_result(result):
+    """Human-readable output of a single solve() result"""
+    number = result["number"]
+    if "mode" in result:
+        if result["mode"] == "is-prime":
+            text = f"{number} is prime" if result["is_prime"] else f"{number} is not prime"
+            if result["smallest_factor"] is not None:
+                text += f" (smallest factor {result['smallest_factor']})"
+        elif result["smallest_factor"] is None:
+            text = f"Smallest factor of {number}: none (no divisor in [2, sqrt(n)])"
+        else:
+            text = f"Smallest factor of {number}: {result['smallest_factor']}"
+        if result.get("cached"):
+            return text + "\n(from cache)"
+        t_first = result["time_to_first_seconds"]
+        if t_first is not None:
+            text += f"\nTime to first factor: {t_first:.6f}s"
+        return text + f"\nTotal search time: {result['total_seconds']:.6f}s"
+    if "prime_factors" in result:
+        text = f"Prime factors of {number}: {rho.format_factorization(result['prime_factors'])}"
+    elif "divisors" in result:
+        text = f"Divisors of {number}: {result['divisors']}"
+    else:
+        text = f"Factors of {number}: {result['factors']}"
+    if result.get("cached"):
+        return text + "\n(from cache)"
+    if "portfolio" in result:
+        text += "\n" + portfolio.format_wins(result["portfolio"])
+    if "balance" in result:
+        import scheduler
+
+        text += "\n" + scheduler.format_balance_report(result["balance"])
+    return text
+
+
 def main():
+    args = parse_args()
+
+    if args.backend != "mpi":
+        if args.timing is not None:
+            timing.enable(startup=time.perf_counter() - T_START)
+        result = solve(None, args.number, args)
+        with timing.phase("output"):
+            print(format_result(result))
+        if args.timing is not None:
+            timing.write_report(timing.report(), args.timing)
+        return
+
+    from mpi4py import MPI
+
     comm = MPI.COMM_WORLD
     rank = comm.Get_rank()
-    size = comm.Get_size()
 
-    number = int(argv[1])
-    limit = int(sqrt(number)) + 1
+    if args.serve is not None:
+        server.serve(
+            comm,
+            solve,
+            args,
+            args.serve,
+            choices=CHOICES,
+        )
+        return
 
-    # split side for process
-    chunk = limit // size
-    start = rank * chunk + 2
-    end = (rank + 1) * chunk + 2 if rank != size - 1 else limit
+    if args.input is not None:
+        if args.algorithm == "primes":
+            # build once on every rank together, not per rank inside the batch
+            primes.ensure_table(args.prime_bound, args.prime_table, comm)
+        batch.run(
+            comm,
+            lambda c, n: solve(c, n, args),
+            args.input,
+            args.output,
+            args.algorithm,
+            args.batch_size,
+            args.split_threshold,
+        )
+        return
 
-    local_factors = factor(number, start, end)
-    all_factors = comm.gather(local_factors, root=0)
+    if args.timing is not None:
+        timing.enable(comm, startup=time.perf_counter() - T_START)
 
-    if rank == 0:
-        # รวม array ทั้งหมดเป็นอันเดียว
-        all_factors = np.concatenate(all_factors)
-        all_factors = np.unique(all_factors)
-        print(f"Factors of {number}: {all_factors}")
+    result = solve(comm, args.number, args)
+    with timing.phase("output"):
+        if rank == 0:
+            print(format_result(result))
+    if args.timing is not None:
+        report = timing.report()
+        if rank == 0:
+            timing.write_report(report, args.timing)
 
 
 if __name__ == "__main__":
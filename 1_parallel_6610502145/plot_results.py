@@ -3,25 +3,49 @@
 Publication-quality visualization script for parallel processing benchmark results
 """
 
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-from sys import argv
-import os
 
-# ตั้งค่า style สำหรับกราฟแบบ publication-quality
-plt.style.use("seaborn-v0_8-paper")
-sns.set_palette("husl")
-plt.rcParams["figure.dpi"] = 300
-plt.rcParams["savefig.dpi"] = 300
-plt.rcParams["font.size"] = 10
-plt.rcParams["axes.labelsize"] = 11
-plt.rcParams["axes.titlesize"] = 12
-plt.rcParams["xtick.labelsize"] = 9
-plt.rcParams["ytick.labelsize"] = 9
-plt.rcParams["legend.fontsize"] = 9
-plt.rcParams["figure.titlesize"] = 13
+PREVIEW_DPI = 72
+# per-directory record of what each output was last rendered from
+MANIFEST = ".render_cache.json"
+
+
+def apply_style(preview=False):
+    """Publication style at 300 dpi, or a fast preview: default matplotlib style, low dpi, no seaborn"""
+    plt.rcdefaults()
+    if preview:
+        plt.rcParams["figure.dpi"] = PREVIEW_DPI
+        plt.rcParams["savefig.dpi"] = PREVIEW_DPI
+        return
+
+    import seaborn as sns
+
+    # ตั้งค่า style สำหรับกราฟแบบ publication-quality
+    plt.style.use("seaborn-v0_8-paper")
+    sns.set_palette("husl")
+    plt.rcParams["figure.dpi"] = 300
+    plt.rcParams["savefig.dpi"] = 300
+    plt.rcParams["font.size"] = 10
+    plt.rcParams["axes.labelsize"] = 11
+    plt.rcParams["axes.titlesize"] = 12
+    plt.rcParams["xtick.labelsize"] = 9
+    plt.rcParams["ytick.labelsize"] = 9
+    plt.rcParams["legend.fontsize"] = 9
+    plt.rcParams["figure.titlesize"] = 13
+
+
+apply_style()
 
 
 def load_data(csv_file):
@@ -175,7 +199,11 @@ def plot_efficiency(df, output_dir):
 
 def plot_combined_metrics(df, output_dir):
     """Plot 4: Combined Metrics Dashboard"""
-    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    # benchmark.py records OS resource usage per run; show it in a third row when present
+    has_resources = "cpu_user" in df.columns
+    fig, axes = plt.subplots(
+        3 if has_resources else 2, 2, figsize=(12, 15 if has_resources else 10)
+    )
     fig.suptitle(
         "Parallel Processing Performance Dashboard",
         fontsize=14,
@@ -290,6 +318,79 @@ def plot_combined_metrics(df, output_dir):
 
     ax4.set_title("Performance Summary", fontweight="bold", pad=20)
 
+    if has_resources:
+        # Subplot 5: CPU time (user/system) and CPU seconds per wall second
+        ax5 = axes[2, 0]
+        ax5.bar(
+            df["num_processes"],
+            df["cpu_user"],
+            color="#2E86AB",
+            edgecolor="black",
+            alpha=0.8,
+            label="User",
+        )
+        ax5.bar(
+            df["num_processes"],
+            df["cpu_system"],
+            bottom=df["cpu_user"],
+            color="#F18F01",
+            edgecolor="black",
+            alpha=0.8,
+            label="System",
+        )
+        ax5_twin = ax5.twinx()
+        ax5_twin.plot(
+            df["num_processes"],
+            df["cpu_per_wall"],
+            marker="o",
+            linewidth=2,
+            color="#C73E1D",
+            label="CPU / wall",
+        )
+        ax5.set_xlabel("Number of Processes")
+        ax5.set_ylabel("CPU Time (seconds)")
+        ax5_twin.set_ylabel("CPU seconds per wall second", color="#C73E1D")
+        ax5.set_title("CPU Usage", fontweight="bold")
+        ax5.grid(True, alpha=0.3, axis="y")
+        ax5.legend(loc="upper left")
+        ax5.set_xticks(df["num_processes"][::2])
+
+        # Subplot 6: Context switches and memory
+        ax6 = axes[2, 1]
+        ax6.plot(
+            df["num_processes"],
+            df["voluntary_ctx_switches"],
+            marker="s",
+            linewidth=2,
+            color="#A23B72",
+            label="Voluntary",
+        )
+        ax6.plot(
+            df["num_processes"],
+            df["involuntary_ctx_switches"],
+            marker="^",
+            linewidth=2,
+            color="#6A994E",
+            label="Involuntary",
+        )
+        rss_column = "rank_rss_max_mb" if "rank_rss_max_mb" in df.columns else "max_rss_mb"
+        ax6_twin = ax6.twinx()
+        ax6_twin.plot(
+            df["num_processes"],
+            df[rss_column],
+            linestyle="--",
+            linewidth=2,
+            color="gray",
+            label="Max RSS",
+        )
+        ax6.set_xlabel("Number of Processes")
+        ax6.set_ylabel("Context Switches")
+        ax6_twin.set_ylabel("Max RSS (MB)")
+        ax6.set_title("Context Switches & Memory", fontweight="bold")
+        ax6.grid(True, alpha=0.3)
+        ax6.legend(loc="upper left")
+        ax6.set_xticks(df["num_processes"][::2])
+
     plt.tight_layout()
     plt.savefig(f"{output_dir}/04_dashboard.png", bbox_inches="tight")
     print(f"✓ Saved: {output_dir}/04_dashboard.png")
@@ -465,6 +566,139 @@ def plot_comparative_analysis(df, output_dir):
     plt.close()
 
 
+def plot_weak_scaling(df, output_dir):
+    """Plot 7: Weak Scaling (problem size grows with the process count)"""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+
+    ax1.plot(
+        df["num_processes"],
+        df["num_processes"],
+        linestyle="--",
+        linewidth=2,
+        color="gray",
+        label="Ideal (Gustafson, serial fraction 0)",
+        alpha=0.7,
+    )
+    ax1.plot(
+        df["num_processes"],
+        df["speedup"],
+        marker="o",
+        linewidth=2.5,
+        markersize=8,
+        color="#2E86AB",
+        label="Scaled Speedup",
+    )
+    ax1.set_xlabel("Number of Processes", fontweight="bold")
+    ax1.set_ylabel("Scaled Speedup  N·T(1)/T(N)", fontweight="bold")
+    ax1.set_title("Weak Scaling: Scaled Speedup", fontweight="bold", pad=15)
+    ax1.grid(True, alpha=0.3, linestyle="--")
+    ax1.set_xticks(df["num_processes"])
+    ax1.legend(loc="upper left")
+
+    ax2.plot(
+        df["num_processes"],
+        df["efficiency"],
+        marker="s",
+        linewidth=2.5,
+        markersize=8,
+        color="#F18F01",
+    )
+    ax2.axhline(y=100, color="gray", linestyle="--", linewidth=2, alpha=0.7)
+    ax2.set_xlabel("Number of Processes", fontweight="bold")
+    ax2.set_ylabel("Weak Efficiency  T(1)/T(N) (%)", fontweight="bold")
+    ax2.set_title("Weak Scaling: Efficiency", fontweight="bold", pad=15)
+    ax2.grid(True, alpha=0.3, linestyle="--")
+    ax2.set_xticks(df["num_processes"])
+
+    plt.tight_layout()
+    plt.savefig(f"{output_dir}/07_weak_scaling.png", bbox_inches="tight")
+    print(f"✓ Saved: {output_dir}/07_weak_scaling.png")
+    plt.close()
+
+
+def plot_size_grid(df, output_dir):
+    """Plot 8: Problem Size × Process Count Grid"""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+
+    times = df.pivot(index="size_bits", columns="num_processes", values="time_seconds")
+    efficiency = df.pivot(index="size_bits", columns="num_processes", values="efficiency")
+
+    import seaborn as sns
+
+    sns.heatmap(times, annot=True, fmt=".2f", cmap="viridis_r", ax=ax1)
+    ax1.set_title("Execution Time (s)", fontweight="bold", pad=15)
+    sns.heatmap(efficiency, annot=True, fmt=".0f", cmap="RdYlGn", vmin=0, vmax=100, ax=ax2)
+    ax2.set_title("Strong-Scaling Efficiency per Size (%)", fontweight="bold", pad=15)
+    for ax in (ax1, ax2):
+        ax.set_xlabel("Number of Processes", fontweight="bold")
+        ax.set_ylabel("Problem Size (log2 n)", fontweight="bold")
+        ax.invert_yaxis()
+
+    plt.tight_layout()
+    plt.savefig(f"{output_dir}/08_size_grid.png", bbox_inches="tight")
+    print(f"✓ Saved: {output_dir}/08_size_grid.png")
+    plt.close()
+
+
+def gustafson_serial_fraction(num_processes, scaled_speedup):
+    """Serial fraction α from Gustafson's law S = N - α(N - 1); NaN at N = 1"""
+    n = np.asarray(num_processes, dtype=float)
+    s = np.asarray(scaled_speedup, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(n > 1, (n - s) / (n - 1), np.nan)
+
+
+def generate_sweep_report(df, output_dir):
+    """Generate text report for a weak-scaling or size-grid sweep"""
+    report_file = f"{output_dir}/sweep_report.txt"
+    sweep = df["sweep"].iloc[0]
+
+    with open(report_file, "w", encoding="utf-8") as f:
+        f.write("=" * 70 + "\n")
+        f.write(f"PROBLEM-SIZE SWEEP REPORT ({sweep.upper()})\n")
+        f.write("=" * 70 + "\n\n")
+
+        if sweep == "weak":
+            alpha = gustafson_serial_fraction(df["num_processes"], df["speedup"])
+            valid = alpha[~np.isnan(alpha)]
+
+            f.write("GUSTAFSON ANALYSIS\n")
+            f.write("-" * 70 + "\n")
+            f.write("Scaled speedup S(N) = N * T(1, n) / T(N, n * N^2)\n")
+            f.write("Serial fraction a(N) = (N - S) / (N - 1)   [S = N - a(N - 1)]\n\n")
+            table = df[["num_processes", "size_bits", "time_seconds", "speedup", "efficiency"]].copy()
+            table["serial_fraction"] = alpha
+            f.write(table.to_string(index=False))
+            f.write("\n\n")
+            if len(valid):
+                a = float(np.median(valid))
+                n_max = int(df["num_processes"].max())
+                f.write(f"Median serial fraction: {a:.4f}\n")
+                f.write(
+                    f"Predicted scaled speedup at N={2 * n_max}: {2 * n_max - a * (2 * n_max - 1):.2f}x\n"
+                )
+                f.write(f"Weak efficiency at N={n_max}: {df['efficiency'].iloc[-1]:.2f}%\n\n")
+        else:
+            f.write("STRONG SCALING PER PROBLEM SIZE\n")
+            f.write("-" * 70 + "\n")
+            for bits, group in df.groupby("size_bits"):
+                best = group.loc[group["speedup"].idxmax()]
+                f.write(
+                    f"log2 n = {bits:6.2f}: best speedup {best['speedup']:.2f}x at "
+                    f"{int(best['num_processes'])} processes, "
+                    f"efficiency at N={int(group['num_processes'].max())}: "
+                    f"{group['efficiency'].iloc[-1]:.2f}%\n"
+                )
+            f.write("\n")
+
+        f.write("DETAILED RESULTS\n")
+        f.write("-" * 70 + "\n")
+        f.write(df.to_string(index=False))
+        f.write("\n\n" + "=" * 70 + "\n")
+
+    print(f"✓ Saved: {report_file}")
+
+
 def generate_summary_report(df, output_dir):
     """Generate text summary report"""
     report_file = f"{output_dir}/performance_report.txt"
@@ -512,56 +746,143 @@ def generate_summary_report(df, output_dir):
     print(f"✓ Saved: {report_file}")
 
 
-def main():
-    if len(argv) < 2:
-        print("Usage: python3 plot_results.py <csv_file>")
-        print("Example: python3 plot_results.py benchmark_results_20250101_120000.csv")
-        return
+# output file -> function that writes it; strong-scaling CSVs and --sweep CSVs
+FIGURES = {
+    "01_execution_time.png": plot_execution_time,
+    "02_speedup_analysis.png": plot_speedup,
+    "03_efficiency.png": plot_efficiency,
+    "04_dashboard.png": plot_combined_metrics,
+    "05_scalability.png": plot_scalability,
+    "06_comparative_analysis.png": plot_comparative_analysis,
+    "performance_report.txt": generate_summary_report,
+}
+SWEEP_FIGURES = {
+    "07_weak_scaling.png": plot_weak_scaling,
+    "08_size_grid.png": plot_size_grid,
+    "sweep_report.txt": generate_sweep_report,
+}
+
+
+def figures_for(df):
+    """Names of the outputs that apply to this CSV"""
+    if "sweep" not in df.columns:
+        return list(FIGURES)
+    plot = "07_weak_scaling.png" if df["sweep"].iloc[0] == "weak" else "08_size_grid.png"
+    return [plot, "sweep_report.txt"]
+
+
+def render_key(df, name, preview):
+    """Hash of the CSV rows and the plotting parameters behind one output"""
+    digest = hashlib.sha256()
+    digest.update(df.to_csv(index=False).encode())
+    digest.update(json.dumps({"figure": name, "preview": preview}).encode())
+    return digest.hexdigest()
+
+
+def _render(name, df, output_dir, preview):
+    apply_style(preview)
+    {**FIGURES, **SWEEP_FIGURES}[name](df, output_dir)
+    return name
+
+
+def render_all(df, output_dir, preview=False, workers=None, force=False):
+    """
+    Render every output for `df` into `output_dir` in a process pool.
+
+    An output is skipped when the file exists and its CSV rows and parameters
+    hash to what the manifest recorded at its last render. Returns the names
+    actually rendered.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    keys = {name: render_key(df, name, preview) for name in figures_for(df)}
+    todo = [
+        name
+        for name, key in keys.items()
+        if force
+        or manifest.get(name) != key
+        or not os.path.exists(os.path.join(output_dir, name))
+    ]
+    for name in keys:
+        if name not in todo:
+            print(f"✓ Unchanged: {output_dir}/{name}")
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(
+                pool.map(
+                    _render,
+                    todo,
+                    [df] * len(todo),
+                    [output_dir] * len(todo),
+                    [preview] * len(todo),
+                )
+            )
+    else:
+        done = [_render(name, df, output_dir, preview) for name in todo]
+        apply_style()
+
+    manifest.update({name: keys[name] for name in done})
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return done
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Render benchmark graphs and the text report from a benchmark CSV."
+    )
+    parser.add_argument("csv_file", help="benchmark_results_*.csv or benchmark_sweep_*.csv")
+    parser.add_argument("--output-dir", default="graphs", help="Output directory (default: graphs).")
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help=f"Quick look: {PREVIEW_DPI} dpi and plain matplotlib style instead of 300 dpi seaborn.",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Render processes (default: CPU count; 1 renders in-process)."
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Re-render even when the inputs are unchanged."
+    )
+    return parser.parse_args()
+
 
-    csv_file = argv[1]
+def main():
+    args = parse_args()
+    csv_file = args.csv_file
 
     if not os.path.exists(csv_file):
         print(f"Error: File '{csv_file}' not found!")
         return
 
-    # Create output directory
-    output_dir = "graphs"
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = args.output_dir
 
     print("\n" + "=" * 70)
     print("GENERATING PUBLICATION-QUALITY GRAPHS")
     print("=" * 70 + "\n")
 
-    # Load data
     df = load_data(csv_file)
     print(f"✓ Loaded data from {csv_file}")
     print(f"  - {len(df)} data points\n")
 
-    # Generate all plots
     print("Generating graphs...\n")
-    plot_execution_time(df, output_dir)
-    plot_speedup(df, output_dir)
-    plot_efficiency(df, output_dir)
-    plot_combined_metrics(df, output_dir)
-    plot_scalability(df, output_dir)
-    plot_comparative_analysis(df, output_dir)
-
-    # Generate summary report
-    print("\nGenerating summary report...\n")
-    generate_summary_report(df, output_dir)
+    rendered = render_all(df, output_dir, args.preview, args.workers, args.force)
 
     print("\n" + "=" * 70)
-    print("✓ ALL GRAPHS GENERATED SUCCESSFULLY!")
+    print(f"✓ {len(rendered)} FILE(S) RENDERED, THE REST UNCHANGED")
     print("=" * 70)
     print(f"\nOutput directory: {output_dir}/")
     print("\nGenerated files:")
-    print("  1. 01_execution_time.png       - Execution time vs processes")
-    print("  2. 02_speedup_analysis.png     - Speedup comparison with ideal")
-    print("  3. 03_efficiency.png           - Parallel efficiency analysis")
-    print("  4. 04_dashboard.png            - Complete performance dashboard")
-    print("  5. 05_scalability.png          - Scalability analysis")
-    print("  6. 06_comparative_analysis.png - Comprehensive comparison")
-    print("  7. performance_report.txt      - Detailed text report")
+    for i, name in enumerate(figures_for(df), start=1):
+        print(f"  {i}. {name}")
     print("\n")
 
 
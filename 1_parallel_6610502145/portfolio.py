@@ -0,0 +1,217 @@
+"""
+Algorithm portfolio: race several factoring strategies against each other.
+
+The ranks are split into one group per strategy (rank r joins group
+r % len(mix)); with fewer ranks than strategies, rank r interleaves strategies
+r, r + P, ... and without MPI a single process interleaves them all. Every
+strategy is a generator that yields after a batch of work and returns a
+nontrivial factor, or None once it has given up:
+
+  trial   vectorized trial division, blocks dealt round-robin in the group
+  fermat  Fermat's method (a^2 - n = b^2), good when the factors are close
+  rho     Pollard-Brent rho, one walk per group rank
+  pm1     Pollard p-1 stage 1 (finds p when p - 1 is smooth), one base per rank
+
+A rank whose strategy returns a factor checks that it really divides n, then
+announces it to every other rank with non-blocking sends; between batches the
+ranks poll for announcements and stop. Everyone then agrees on the earliest
+find, so each split yields the same factor on every rank along with the
+winning strategy and its time.
+"""
+
+import random
+import time
+from math import isqrt
+
+import bigint
+import primes
+import rho
+
+STRATEGIES = ["trial", "fermat", "rho", "pm1"]
+
+TAG_FOUND = 31
+TRIAL_BLOCK = 1 << 16
+FERMAT_BATCH = 1 << 12
+PM1_SEGMENT = 1 << 16
+PM1_MAX_BOUND = 1 << 22
+
+
+def trial_steps(n, kernel, memory_mb, rank, size):
+    """Divide by 2..sqrt(n) in blocks b = rank, rank + size, ...; the first hit wins"""
+    end = isqrt(n) + 1
+    for lo in range(2 + rank * TRIAL_BLOCK, end, size * TRIAL_BLOCK):
+        found = kernel(n, lo, min(end, lo + TRIAL_BLOCK), memory_mb)
+        if found.size:
+            return int(found[0])
+        yield
+    return None
+
+
+def fermat_steps(n, rank, size):
+    """Try a = ceil(sqrt(n)) + rank, + size, ... until a^2 - n is a square"""
+    if n % 2 == 0:
+        return 2
+    a = isqrt(n)
+    if a * a < n:
+        a += 1
+    a += rank
+    # a = (n + 1) / 2 only gives the trivial split 1 * n
+    last = (n + 1) // 2
+    while a < last:
+        for _ in range(FERMAT_BATCH):
+            b2 = a * a - n
+            b = isqrt(b2)
+            if b * b == b2 and a - b > 1:
+                return a - b
+            a += size
+            if a >= last:
+                break
+        yield
+    return None
+
+
+def rho_steps(n, rank):
+    return (yield from rho.brent_walk(n, random.Random(rank)))
+
+
+def pm1_steps(n, rank):
+    """Stage 1 with base 2 + rank and a bound that grows one sieve segment per batch"""
+    n = bigint.fast_int(n)
+    x = 2 + rank
+    base = primes.simple_sieve(isqrt(PM1_MAX_BOUND) + 1)
+    for lo in range(2, PM1_MAX_BOUND, PM1_SEGMENT):
+        hi = lo + PM1_SEGMENT
+        for q in primes.sieve_segment(lo, hi, base).tolist():
+            # largest power of q within the final bound
+            qk = q
+            while qk * q < PM1_MAX_BOUND:
+                qk *= q
+            x = pow(x, qk, n)
+        g = bigint.gcd(x - 1, n)
+        if g == n:
+            # every prime's order divided the exponent in this segment; give up
+            return None
+        if g > 1:
+            return int(g)
+        yield
+    return None
+
+
+def start_strategy(name, n, kernel, memory_mb, rank, size):
+    if name == "trial":
+        return trial_steps(n, kernel, memory_mb, rank, size)
+    if name == "fermat":
+        return fermat_steps(n, rank, size)
+    if name == "rho":
+        return rho_steps(n, rank)
+    return pm1_steps(n, rank)
+
+
+def _poll(comm, MPI):
+    """True once another rank has announced a factor (the message is consumed)"""
+    if comm.iprobe(source=MPI.ANY_SOURCE, tag=TAG_FOUND):
+        comm.recv(source=MPI.ANY_SOURCE, tag=TAG_FOUND)
+        return True
+    return False
+
+
+def race(comm, n, mix, kernel, memory_mb):
+    """
+    One nontrivial factor of the composite `n`, found by racing `mix`.
+
+    Returns (factor, strategy, seconds) on every rank of `comm` (or of a
+    single process when comm is None); seconds is the time from the common
+    start to the winning find.
+    """
+    rank = comm.Get_rank() if comm is not None else 0
+    size = comm.Get_size() if comm is not None else 1
+    MPI = None
+    if comm is not None:
+        from mpi4py import MPI
+
+    if size >= len(mix):
+        color = rank % len(mix)
+        mine = [mix[color]]
+    else:
+        color = rank
+        mine = mix[rank::size]
+    group = comm.Split(color=color, key=rank) if comm is not None else None
+    g_rank = group.Get_rank() if group is not None else 0
+    g_size = group.Get_size() if group is not None else 1
+
+    if comm is not None:
+        comm.Barrier()
+    t_start = time.perf_counter()
+
+    running = {name: start_strategy(name, n, kernel, memory_mb, g_rank, g_size) for name in mine}
+    found = None
+    received = 0
+    requests = []
+    while running and found is None:
+        if comm is not None and _poll(comm, MPI):
+            received += 1
+            break
+        for name, steps in list(running.items()):
+            try:
+                next(steps)
+            except StopIteration as stop:
+                del running[name]
+                d = stop.value
+                if d is not None and 1 < d < n and n % d == 0:
+                    found = (int(d), name, time.perf_counter() - t_start)
+                    break
+    for steps in running.values():
+        steps.close()
+
+    if comm is None:
+        return found or fallback(n, t_start)
+
+    if found is not None:
+        requests = [comm.isend(True, dest=other, tag=TAG_FOUND) for other in range(size) if other != rank]
+    # drain the announcements still in flight so the next race starts clean
+    announced = comm.allgather(found is not None)
+    expected = sum(announced) - (1 if found is not None else 0)
+    while received < expected:
+        comm.recv(source=MPI.ANY_SOURCE, tag=TAG_FOUND)
+        received += 1
+    MPI.Request.Waitall(requests)
+    group.Free()
+
+    finds = [(f[2], r, f) for r, f in enumerate(comm.allgather(found)) if f is not None]
+    if not finds:
+        return fallback(n, t_start)
+    return min(finds)[2]
+
+
+def fallback(n, t_start):
+    """Every strategy gave up (e.g. p-1 alone in the mix): a seeded rho walk, same on all ranks"""
+    return rho.pollard_brent(n), "rho (fallback)", time.perf_counter() - t_start
+
+
+def factorize(comm, n, mix, kernel, memory_mb):
+    """
+    Prime factorization of n via rho.factorize, one race per composite split.
+
+    Returns ({prime: exponent}, wins) where wins lists every race as
+    {"cofactor", "factor", "strategy", "seconds"}.
+    """
+    wins = []
+
+    def split(m):
+        d, strategy, seconds = race(comm, m, mix, kernel, memory_mb)
+        wins.append({"cofactor": m, "factor": d, "strategy": strategy, "seconds": seconds})
+        return d
+
+    return rho.factorize(n, split=split), wins
+
+
+def format_wins(wins):
+    """One line per race: which strategy split which cofactor, and when"""
+    if not wins:
+        return "portfolio: no composite cofactor left after small primes"
+    lines = ["portfolio races:"]
+    for win in wins:
+        lines.append(
+            f"  {win['cofactor']} -> {win['factor']} by {win['strategy']} in {win['seconds']:.6f}s"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Persistent, memory-mapped prime table for trial division by primes only.
+
+The table is a plain .npy array of every prime below `bound`, built with a
+segmented sieve. Under MPI each rank sieves its own segment and writes its
+primes straight into its slice of the shared file; afterwards every rank maps
+the same file read-only (np.load(..., mmap_mode="r")), so the pages are shared
+through the OS page cache with no per-rank copy.
+
+Build ahead of time (optional, parallel.py builds a missing table on demand):
+    mpirun -n 4 python3 primes.py --bound 268435456
+"""
+
+import argparse
+import fcntl
+import os
+from math import isqrt
+from pathlib import Path
+
+import numpy as np
+
+import bigint
+
+# covers sqrt(2^55), the largest benchmark case
+DEFAULT_BOUND = 1 << 28
+SEGMENT = 1 << 24
+
+
+def default_path(bound):
+    return Path(f"prime_table_{bound}.npy")
+
+
+def table_dtype(bound):
+    return np.uint32 if bound <= 1 << 32 else np.int64
+
+
+def simple_sieve(limit):
+    """Primes below `limit` with a plain Eratosthenes sieve"""
+    if limit < 3:
+        return np.zeros(0, dtype=np.int64)
+    is_prime = np.ones(limit, dtype=bool)
+    is_prime[:2] = False
+    for p in range(2, isqrt(limit - 1) + 1):
+        if is_prime[p]:
+            is_prime[p * p :: p] = False
+    return np.flatnonzero(is_prime)
+
+
+def sieve_segment(lo, hi, base):
+    """Primes in [lo, hi) given every prime up to sqrt(hi)"""
+    found = []
+    for seg_lo in range(lo, hi, SEGMENT):
+        seg_hi = min(hi, seg_lo + SEGMENT)
+        is_prime = np.ones(seg_hi - seg_lo, dtype=bool)
+        for p in base:
+            p = int(p)
+            if p * p >= seg_hi:
+                break
+            first = max(p * p, -(-seg_lo // p) * p)
+            is_prime[first - seg_lo :: p] = False
+        if seg_lo < 2:
+            is_prime[: 2 - seg_lo] = False
+        found.append(np.flatnonzero(is_prime) + seg_lo)
+    return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+
+def build_table(path, bound, comm=None):
+    """
+    Sieve every prime below `bound` into the .npy file at `path`.
+
+    With a communicator every rank sieves an equal share of [2, bound); the
+    ranks then agree on offsets and write their primes into one file that rank
+    0 preallocates. The file is written under a temporary name unique to this
+    build and renamed, so readers never see a half-built table and concurrent
+    builds do not write into each other's file.
+    """
+    rank = comm.Get_rank() if comm is not None else 0
+    size = comm.Get_size() if comm is not None else 1
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    if comm is not None:
+        tmp = comm.bcast(tmp, root=0)
+
+    base = simple_sieve(isqrt(max(bound - 1, 0)) + 1)
+    chunk = -(-max(bound - 2, 0) // size)
+    lo = min(bound, 2 + rank * chunk)
+    hi = min(bound, lo + chunk)
+    local = sieve_segment(lo, hi, base)
+
+    counts = comm.allgather(local.size) if comm is not None else [local.size]
+    offset = sum(counts[:rank])
+
+    if rank == 0:
+        np.lib.format.open_memmap(
+            tmp, mode="w+", dtype=table_dtype(bound), shape=(sum(counts),)
+        ).flush()
+    if comm is not None:
+        comm.Barrier()
+
+    if local.size:
+        table = np.lib.format.open_memmap(tmp, mode="r+")
+        table[offset : offset + local.size] = local
+        table.flush()
+        del table
+    if comm is not None:
+        comm.Barrier()
+
+    if rank == 0:
+        os.replace(tmp, path)
+    if comm is not None:
+        comm.Barrier()
+    return path
+
+
+def load_table(path):
+    """Map the table read-only; every process mapping it shares the same pages"""
+    return np.load(path, mmap_mode="r")
+
+
+def ensure_table(bound=DEFAULT_BOUND, path=None, comm=None):
+    """
+    Path of the table for `bound`, building it (collectively under MPI) if missing.
+
+    Other processes may be after the same table (batch-mode ranks on their own
+    communicators, separate runs), so rank 0 builds under an exclusive lock on
+    `<path>.lock` and checks again once it holds it: the first builder wins
+    and the rest just map its file.
+    """
+    path = Path(path) if path is not None else default_path(bound)
+    rank = comm.Get_rank() if comm is not None else 0
+    exists = path.exists()
+    if comm is not None:
+        exists = comm.bcast(exists, root=0)
+    if exists:
+        return path
+
+    lock = None
+    if rank == 0:
+        lock = open(path.with_name(path.name + ".lock"), "w")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        exists = path.exists()
+    if comm is not None:
+        exists = comm.bcast(exists, root=0)
+    try:
+        if not exists:
+            build_table(path, bound, comm)
+    finally:
+        if lock is not None:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+    return path
+
+
+def prime_count_upto(table, limit):
+    """Number of table entries <= limit"""
+    return int(np.searchsorted(table, limit, side="right"))
+
+
+def divide_by_primes(path, num, lo, hi, memory_mb=64):
+    """
+    Primes table[lo:hi] that divide num.
+
+    Has the common kernel signature once `path` is bound (functools.partial),
+    so it runs unchanged on MPI ranks and in process/thread pools; each caller
+    maps the table itself instead of receiving a copy.
+    """
+    table = load_table(path)
+    # same per-candidate budget as parallel.block_size_for
+    block = max(1, int(memory_mb * 1024 * 1024) // 17)
+    hits = []
+    limbs = None
+    if num > bigint.INT64_MAX and hi > lo:
+        shift = bigint.limb_shift(int(table[hi - 1]))
+        limbs = bigint.to_limbs(num, shift)
+
+    for start in range(lo, hi, block):
+        cand = table[start : min(hi, start + block)].astype(np.int64)
+        if limbs is None:
+            rem = np.remainder(num, cand)
+        else:
+            rem = bigint.mod_limbs(limbs, shift, cand, np.empty_like(cand))
+        hits.append(cand[rem == 0])
+    return np.concatenate(hits) if hits else np.zeros(0, dtype=np.int64)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Build the memory-mapped prime table (run under mpirun to sieve in parallel)."
+    )
+    parser.add_argument(
+        "--bound",
+        type=int,
+        default=DEFAULT_BOUND,
+        help=f"Store every prime below this bound (default: {DEFAULT_BOUND}).",
+    )
+    parser.add_argument("--path", help="Output .npy path (default: prime_table_<bound>.npy).")
+    parser.add_argument(
+        "--no-mpi", action="store_true", help="Sieve serially without importing mpi4py."
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    comm = None
+    if not args.no_mpi:
+        from mpi4py import MPI
+
+        comm = MPI.COMM_WORLD
+
+    path = Path(args.path) if args.path else default_path(args.bound)
+    build_table(path, args.bound, comm)
+    if comm is None or comm.Get_rank() == 0:
+        table = load_table(path)
+        print(f"✓ {table.size:,} primes below {args.bound:,} saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+OS-level resource accounting for one benchmark launch.
+
+The child (mpirun or the pool's interpreter) is reaped with os.wait4, whose
+rusage covers it and every descendant it waited for: user/system CPU, the
+largest max RSS among them, and voluntary/involuntary context switches.
+
+With a sample interval, a background thread also reads /proc/<pid>/stat of
+every Python process under the child (the MPI ranks, or the pool workers) to
+get per-rank CPU time and peak RSS, which wait4 folds into one number.
+"""
+
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+USAGE_FIELDS = [
+    "cpu_user",
+    "cpu_system",
+    "cpu_per_wall",
+    "max_rss_mb",
+    "voluntary_ctx_switches",
+    "involuntary_ctx_switches",
+]
+SAMPLE_FIELDS = ["sampled_ranks", "rank_cpu_max", "rank_cpu_mean", "rank_rss_max_mb"]
+
+
+def read_stat(pid):
+    """(comm, ppid, cpu seconds, rss bytes) from /proc/<pid>/stat, or None once it is gone"""
+    try:
+        text = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # comm may contain spaces, so split after its closing parenthesis
+    comm = text[text.index("(") + 1 : text.rindex(")")]
+    fields = text[text.rindex(")") + 2 :].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return comm, int(fields[1]), cpu, int(fields[21]) * PAGE_SIZE
+
+
+class ProcSampler(threading.Thread):
+    """Poll the Python processes under `root` until stop() is called"""
+
+    def __init__(self, root, interval):
+        super().__init__(daemon=True)
+        self.root = root
+        self.interval = interval
+        self.cpu = {}
+        self.rss = {}
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        stats = {}
+        for entry in os.scandir("/proc"):
+            if entry.name.isdigit():
+                stat = read_stat(int(entry.name))
+                if stat is not None:
+                    stats[int(entry.name)] = stat
+
+        tree = {self.root}
+        changed = True
+        while changed:
+            children = {pid for pid, stat in stats.items() if stat[1] in tree} - tree
+            tree |= children
+            changed = bool(children)
+
+        for pid in tree:
+            if pid in stats and stats[pid][0].startswith("python"):
+                _, _, cpu, rss = stats[pid]
+                self.cpu[pid] = cpu
+                self.rss[pid] = max(self.rss.get(pid, 0), rss)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def summary(self):
+        cpu = list(self.cpu.values()) or [0.0]
+        return {
+            "sampled_ranks": len(self.cpu),
+            "rank_cpu_max": max(cpu),
+            "rank_cpu_mean": sum(cpu) / len(cpu),
+            "rank_rss_max_mb": max(self.rss.values(), default=0) / 2**20,
+        }
+
+
+def run_measured(command, sample_interval=None):
+    """
+    Run `command` to completion.
+
+    Returns (wall-clock seconds, usage) where usage holds USAGE_FIELDS and, with
+    a sample interval, SAMPLE_FIELDS. Raises CalledProcessError on failure.
+    """
+    start = time.time()
+    process = subprocess.Popen(command)
+    sampler = None
+    if sample_interval:
+        sampler = ProcSampler(process.pid, sample_interval)
+        sampler.start()
+
+    _, status, rusage = os.wait4(process.pid, 0)
+    elapsed = time.time() - start
+    # reaped here, so tell Popen it has finished
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if sampler is not None:
+        sampler.stop()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+    usage = {
+        "cpu_user": rusage.ru_utime,
+        "cpu_system": rusage.ru_stime,
+        "cpu_per_wall": (rusage.ru_utime + rusage.ru_stime) / elapsed if elapsed else 0.0,
+        # ru_maxrss is in KiB on Linux
+        "max_rss_mb": rusage.ru_maxrss / 1024,
+        "voluntary_ctx_switches": float(rusage.ru_nvcsw),
+        "involuntary_ctx_switches": float(rusage.ru_nivcsw),
+    }
+    if sampler is not None:
+        usage.update(sampler.summary())
+    return elapsed, usage
@@ -0,0 +1,137 @@
+"""
+Pollard-Brent rho factorization with Miller-Rabin primality checks
+"""
+
+import random
+
+import bigint
+
+# Miller-Rabin with the primes up to 41 as bases is deterministic for
+# n < 3.317e24 (~2^81); without 41 only below 318665857834031151167461 (~2^78),
+# which itself passes bases 2..37. Above 3.317e24 it is a strong probable-prime test.
+MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47)
+DEFAULT_BATCH = 4096
+
+
+def is_prime(n):
+    """Miller-Rabin primality test"""
+    if n < 2:
+        return False
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+
+    n = bigint.fast_int(n)
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for a in MR_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def brent_walk(n, rng, batch=DEFAULT_BATCH):
+    """
+    Brent's variant of Pollard rho as a generator.
+
+    Yields after every `batch` iterations so a caller can interleave other work
+    (e.g. checking whether another rank already found a factor). Returns a
+    nontrivial factor of the composite `n` via StopIteration.value; a walk that
+    collapses to gcd == n is restarted with a new polynomial.
+    """
+    if n % 2 == 0:
+        return 2
+    n = bigint.fast_int(n)
+
+    while True:
+        y = rng.randrange(1, n)
+        c = rng.randrange(1, n)
+        g = r = q = 1
+        x = ys = y
+        steps = 0
+
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+                steps += 1
+                if steps % batch == 0:
+                    yield
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(batch, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = bigint.gcd(q, n)
+                k += batch
+                yield
+            r *= 2
+
+        if g == n:
+            # the batched product overshot; replay one step at a time
+            while True:
+                ys = (ys * ys + c) % n
+                g = bigint.gcd(abs(x - ys), n)
+                if g > 1:
+                    break
+
+        if g != n:
+            return int(g)
+
+
+def pollard_brent(n, seed=0, batch=DEFAULT_BATCH):
+    """Run one Brent walk to completion and return a nontrivial factor of n"""
+    walk = brent_walk(n, random.Random(seed), batch)
+    while True:
+        try:
+            next(walk)
+        except StopIteration as stop:
+            return stop.value
+
+
+def factorize(n, split=pollard_brent):
+    """
+    Full prime factorization of n as {prime: exponent}.
+
+    `split(m)` must return a nontrivial factor of the composite m; the MPI
+    driver passes a splitter that races rho walks across ranks.
+    """
+    factors = {}
+    if n < 2:
+        return factors
+
+    for p in SMALL_PRIMES:
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+            continue
+        d = split(m)
+        stack.extend((d, m // d))
+
+    return dict(sorted(factors.items()))
+
+
+def format_factorization(factors):
+    """Render {prime: exponent} as e.g. '2^3 * 5'"""
+    if not factors:
+        return "1"
+    return " * ".join(f"{p}^{e}" if e > 1 else str(p) for p, e in factors.items())
@@ -0,0 +1,123 @@
+"""
+Dynamic master/worker scheduling of the trial-division range over MPI.
+
+Rank 0 is a dedicated coordinator that hands out [lo, hi) chunks on demand.
+Each worker asks for its next chunk with a non-blocking send before it starts
+computing the current one, so the coordinator's reply overlaps with compute.
+Chunk size follows the worker's measured throughput (candidates/second) so that
+one chunk takes roughly `target_seconds`, and shrinks near the end of the range
+(guided self-scheduling) to keep the tail balanced.
+"""
+
+from mpi4py import MPI
+import numpy as np
+
+TAG_REQUEST = 1
+TAG_WORK = 2
+
+MIN_CHUNK = 1 << 12
+MAX_CHUNK = 1 << 24
+TARGET_SECONDS = 0.05
+
+
+def next_chunk_size(rate, remaining, workers, target_seconds=TARGET_SECONDS):
+    """Chunk length for a worker that last processed `rate` candidates/second"""
+    chunk = MIN_CHUNK if rate is None else int(rate * target_seconds)
+    # never hand out more than a fair share of what is left
+    chunk = min(chunk, max(MIN_CHUNK, remaining // (2 * workers)))
+    return max(MIN_CHUNK, min(chunk, MAX_CHUNK))
+
+
+def coordinate(comm, start, end, target_seconds=TARGET_SECONDS):
+    """Serve chunk requests until the range is exhausted; returns timing stats for rank 0"""
+    workers = comm.Get_size() - 1
+    active = workers
+    next_lo = start
+    busy = 0.0
+    chunks = 0
+    status = MPI.Status()
+
+    t_begin = MPI.Wtime()
+    while active:
+        rate = comm.recv(source=MPI.ANY_SOURCE, tag=TAG_REQUEST, status=status)
+        t0 = MPI.Wtime()
+        worker = status.Get_source()
+
+        if next_lo >= end:
+            comm.send(None, dest=worker, tag=TAG_WORK)
+            active -= 1
+        else:
+            size = next_chunk_size(rate, end - next_lo, workers, target_seconds)
+            hi = min(end, next_lo + size)
+            comm.send((next_lo, hi), dest=worker, tag=TAG_WORK)
+            next_lo = hi
+            chunks += 1
+        busy += MPI.Wtime() - t0
+
+    total = MPI.Wtime() - t_begin
+    return {"busy": busy, "idle": total - busy, "chunks": chunks}
+
+
+def work(comm, kernel, number, memory_mb):
+    """Request, compute and prefetch chunks until the coordinator sends None"""
+    busy = 0.0
+    idle = 0.0
+    chunks = 0
+    hits = []
+    rate = None
+
+    pending = comm.isend(rate, dest=0, tag=TAG_REQUEST)
+    while True:
+        t0 = MPI.Wtime()
+        assignment = comm.recv(source=0, tag=TAG_WORK)
+        pending.wait()
+        idle += MPI.Wtime() - t0
+        if assignment is None:
+            break
+
+        lo, hi = assignment
+        pending = comm.isend(rate, dest=0, tag=TAG_REQUEST)
+
+        t0 = MPI.Wtime()
+        hits.append(kernel(number, lo, hi, memory_mb))
+        elapsed = MPI.Wtime() - t0
+        busy += elapsed
+        chunks += 1
+        rate = (hi - lo) / elapsed if elapsed > 0 else None
+
+    local = np.concatenate(hits) if hits else np.zeros(0, dtype=np.int64)
+    return local, {"busy": busy, "idle": idle, "chunks": chunks}
+
+
+def dynamic_factor(comm, kernel, number, start, end, memory_mb):
+    """
+    Run the dynamic schedule on every rank.
+
+    Returns (local_factors, stats) where stats holds this rank's busy/idle
+    seconds and the number of chunks it processed (or handed out, on rank 0).
+    """
+    if comm.Get_size() == 1:
+        t0 = MPI.Wtime()
+        local = kernel(number, start, end, memory_mb)
+        return local, {"busy": MPI.Wtime() - t0, "idle": 0.0, "chunks": 1}
+
+    if comm.Get_rank() == 0:
+        return np.zeros(0, dtype=np.int64), coordinate(comm, start, end)
+    return work(comm, kernel, number, memory_mb)
+
+
+def format_balance_report(all_stats):
+    """Per-rank busy/idle table plus the max/mean busy imbalance ratio"""
+    lines = [f"{'rank':>4} {'role':>11} {'busy_s':>9} {'idle_s':>9} {'chunks':>7}"]
+    for rank, stats in enumerate(all_stats):
+        role = "coordinator" if rank == 0 and len(all_stats) > 1 else "worker"
+        lines.append(
+            f"{rank:>4} {role:>11} {stats['busy']:>9.4f} {stats['idle']:>9.4f} {stats['chunks']:>7}"
+        )
+
+    workers = all_stats[1:] or all_stats
+    busy = [s["busy"] for s in workers]
+    mean_busy = sum(busy) / len(busy)
+    imbalance = max(busy) / mean_busy if mean_busy > 0 else 1.0
+    lines.append(f"load imbalance (max/mean busy): {imbalance:.3f}")
+    return "\n".join(lines)
@@ -0,0 +1,84 @@
+"""
+Early-exit search for the smallest nontrivial factor, with cross-rank cancellation.
+
+The candidate range is cut into fixed-size blocks dealt out round-robin:
+rank r scans blocks r, r + P, r + 2P, ... in ascending order. A rank that hits
+a factor in block b stops and announces b to every other rank with
+non-blocking sends. Between blocks each rank polls for announcements and stops
+as soon as its next block lies beyond the best announced one. Every block
+below the winner is still scanned, so the answer is the true smallest factor,
+and no rank runs more than one block past it.
+"""
+
+from mpi4py import MPI
+import numpy as np
+
+TAG_FOUND = 21
+
+NO_BLOCK = np.iinfo(np.int64).max
+
+
+def _poll(comm, best):
+    """Receive every pending announcement; returns (best block, messages received)"""
+    received = 0
+    while comm.iprobe(source=MPI.ANY_SOURCE, tag=TAG_FOUND):
+        best = min(best, comm.recv(source=MPI.ANY_SOURCE, tag=TAG_FOUND))
+        received += 1
+    return best, received
+
+
+def smallest_factor(comm, kernel, number, start, end, memory_mb, block):
+    """
+    Smallest divisor of `number` in [start, end) on every rank, or None.
+
+    Returns (factor, time_to_first, total) where time_to_first is when the
+    winning rank found the answer and total is when every rank had stopped,
+    both in seconds since the common start.
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    blocks = -(-max(0, end - start) // block)
+
+    comm.Barrier()
+    t_start = MPI.Wtime()
+
+    best = NO_BLOCK
+    received = 0
+    hit = None
+    t_hit = float("inf")
+    requests = []
+
+    for b in range(rank, blocks, size):
+        best, got = _poll(comm, best)
+        received += got
+        if b > best:
+            break
+
+        lo = start + b * block
+        found = kernel(number, lo, min(end, lo + block), memory_mb)
+        if found.size:
+            hit = int(found[0])
+            t_hit = MPI.Wtime() - t_start
+            best = min(best, b)
+            requests = [
+                comm.isend(b, dest=other, tag=TAG_FOUND)
+                for other in range(size)
+                if other != rank
+            ]
+            break
+
+    # drain the announcements still in flight so the communicator stays clean
+    announced = comm.allgather(hit is not None)
+    expected = sum(announced) - (1 if hit is not None else 0)
+    while received < expected:
+        comm.recv(source=MPI.ANY_SOURCE, tag=TAG_FOUND)
+        received += 1
+    MPI.Request.Waitall(requests)
+
+    candidates = [c for c in comm.allgather((hit, t_hit)) if c[0] is not None]
+    total = comm.allreduce(MPI.Wtime() - t_start, op=MPI.MAX)
+
+    if not candidates:
+        return None, None, total
+    winner, t_first = min(candidates)
+    return winner, t_first, total
@@ -0,0 +1,167 @@
+"""
+Persistent factorization server: keep the MPI world up between requests.
+
+Rank 0 listens on a Unix domain socket. Each request is one JSON line such as
+{"number": 34343434, "algorithm": "rho"}; rank 0 broadcasts it to every rank,
+all ranks factor it together through parallel.solve, and rank 0 replies with
+one JSON line holding the same record batch mode writes (plus the server-side
+compute time). {"shutdown": true} stops every rank.
+"""
+
+import argparse
+import json
+import os
+import socket
+import time
+
+import batch
+
+DEFAULT_SOCKET = "/tmp/parallel_factor.sock"
+
+# per-request overrides accepted on top of the server's command-line options
+OVERRIDABLE = ("algorithm", "kernel", "schedule", "collect", "mode", "memory_mb", "no_cache")
+
+
+def _request_args(defaults, request):
+    args = argparse.Namespace(**vars(defaults))
+    for key in OVERRIDABLE:
+        if key in request:
+            setattr(args, key, request[key])
+    return args
+
+
+def _validate(request, choices, defaults):
+    """Why `request` cannot be served (the checks parallel.parse_args makes), or None"""
+    number = request.get("number")
+    # bool is an int subclass; true/false is not a number to factor
+    if not isinstance(number, int) or isinstance(number, bool):
+        return "request needs an integer 'number'"
+    if number < 0:
+        return "number must be non-negative"
+    # other parallel.py options (backend, workers, ...) are fixed when the server starts
+    fixed = sorted(
+        key for key in request if key != "number" and key not in OVERRIDABLE and hasattr(defaults, key)
+    )
+    if fixed:
+        return f"{', '.join(fixed)} cannot be set per request (overridable: {', '.join(OVERRIDABLE)})"
+    for key, allowed in choices.items():
+        if key in request and request[key] not in allowed:
+            return f"{key} must be one of {sorted(allowed)}"
+    if "no_cache" in request and not isinstance(request["no_cache"], bool):
+        return "no_cache must be true or false"
+    if "memory_mb" in request:
+        memory_mb = request["memory_mb"]
+        if not isinstance(memory_mb, (int, float)) or isinstance(memory_mb, bool) or not memory_mb > 0:
+            return "memory_mb must be a positive number"
+    args = _request_args(defaults, request)
+    if args.mode != "all" and args.algorithm != "trial":
+        return "mode smallest/is-prime needs algorithm 'trial'"
+    return None
+
+
+def _solve(comm, solve, number, args):
+    """
+    solve() on every rank, turning a failure into an error message.
+
+    All ranks then agree on whether any of them failed, so a request that
+    raises (on one rank or all) is answered with an error and the server and
+    its ranks stay in step for the next one. Rank 0 returns (result, error).
+    """
+    result, error = None, None
+    try:
+        result = solve(comm, number, args)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    errors = [e for e in comm.allgather(error) if e is not None]
+    return result, (errors[0] if errors else None)
+
+
+def _serve_root(comm, solve, args, socket_path, choices):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+    print(f"Serving on {socket_path} with {comm.Get_size()} rank(s)", flush=True)
+
+    try:
+        running = True
+        while running:
+            conn, _ = listener.accept()
+            with conn, conn.makefile("r", encoding="utf-8") as reader, conn.makefile(
+                "w", encoding="utf-8"
+            ) as writer:
+                for line in reader:
+                    try:
+                        request = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        batch.write_record(writer, {"error": f"bad JSON: {e}"})
+                        writer.flush()
+                        continue
+                    if not isinstance(request, dict):
+                        batch.write_record(writer, {"error": "request must be a JSON object"})
+                        writer.flush()
+                        continue
+
+                    if request.get("shutdown"):
+                        batch.write_record(writer, {"shutdown": True})
+                        writer.flush()
+                        running = False
+                        break
+
+                    error = _validate(request, choices, args)
+                    if error:
+                        batch.write_record(writer, {"error": error})
+                        writer.flush()
+                        continue
+
+                    comm.bcast(request, root=0)
+                    t0 = time.perf_counter()
+                    result, error = _solve(
+                        comm, solve, request["number"], _request_args(args, request)
+                    )
+                    if error:
+                        batch.write_record(writer, {"number": request["number"], "error": error})
+                    else:
+                        result["server_seconds"] = time.perf_counter() - t0
+                        batch.write_record(writer, result)
+                    writer.flush()
+    finally:
+        comm.bcast(None, root=0)
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def serve(comm, solve, args, socket_path=DEFAULT_SOCKET, choices=None):
+    """
+    Run the server loop on every rank of `comm` until a shutdown request.
+
+    `choices` maps overridable option names to their allowed values so rank 0
+    can reject a bad request before it reaches the other ranks.
+    """
+    choices = choices or {}
+    if comm.Get_rank() == 0:
+        _serve_root(comm, solve, args, socket_path, choices)
+        return
+
+    while True:
+        request = comm.bcast(None, root=0)
+        if request is None:
+            break
+        _solve(comm, solve, request["number"], _request_args(args, request))
+
+
+def request(sock_file, payload):
+    """Send one request over an open socket file and return the decoded reply"""
+    sock_file.write(json.dumps(payload) + "\n")
+    sock_file.flush()
+    return json.loads(sock_file.readline())
+
+
+def connect(socket_path=DEFAULT_SOCKET):
+    """Open a line-buffered read/write file on the server socket"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+    return sock, sock.makefile("rw", encoding="utf-8")
@@ -0,0 +1,56 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+# the scripts import each other as top-level modules
+sys.path.insert(0, str(SCRIPTS))
+
+import backends  # noqa: E402
+
+
+RESULT_FOOTER = """
+import json as _json
+from mpi4py import MPI as _MPI
+
+with open(f"{out}/rank_{{_MPI.COMM_WORLD.Get_rank()}}.json", "w") as _out:
+    _json.dump(result, _out)
+"""
+
+
+@pytest.fixture
+def run_mpi(tmp_path):
+    """
+    run_mpi(nproc, code): run `code` on nproc MPI ranks and return the
+    `result` it leaves on each rank (JSON-serializable), in rank order.
+    """
+    if shutil.which("mpirun") is None:
+        pytest.skip("mpirun is not on PATH")
+
+    def run(nproc, code):
+        script = tmp_path / "snippet.py"
+        # one file per rank: prints from several ranks interleave on stdout
+        script.write_text(textwrap.dedent(code) + RESULT_FOOTER.format(out=str(tmp_path)))
+        launch = ["mpirun", "-n", str(nproc)]
+        env = dict(os.environ, PYTHONPATH=str(SCRIPTS))
+        if backends.mpi_launcher() == "openmpi":
+            launch.append("--oversubscribe")
+            env.update(OMPI_ALLOW_RUN_AS_ROOT="1", OMPI_ALLOW_RUN_AS_ROOT_CONFIRM="1")
+        completed = subprocess.run(
+            [*launch, sys.executable, str(script)],
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=300,
+        )
+        assert completed.returncode == 0, completed.stderr
+        return [json.loads((tmp_path / f"rank_{r}.json").read_text()) for r in range(nproc)]
+
+    return run
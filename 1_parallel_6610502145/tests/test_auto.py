@@ -0,0 +1,57 @@
+import auto
+
+import divisors
+
+# 2^61 - 1 is prime: rho settles it at once, the divisor path scans to TRIAL_BOUND first
+MERSENNE_61 = 2**61 - 1
+
+
+def counted_scan(n):
+    """Candidates divisors.strip_small_factors tests on a prime n (nothing divides, so n stays a Counting)"""
+    tested = []
+
+    class Counting(int):
+        def __mod__(self, d):
+            tested.append(d)
+            return int(self) % d
+
+    divisors.strip_small_factors(Counting(n), divisors.TRIAL_BOUND)
+    return len(set(tested))
+
+
+def test_prime_cofactor_costs_the_trial_scan_only():
+    work = auto.features(MERSENNE_61)
+    assert work["rho"] == 1.0
+    # 2 plus the odd numbers below 4096
+    assert work["divisors"] == 2048.0 == counted_scan(MERSENNE_61)
+
+
+def test_divisor_estimate_matches_the_kernel_for_a_small_prime():
+    # 1000003: the scan stops past sqrt = 1000, at 2 and the odd numbers up to 999
+    assert auto.features(1000003)["divisors"] == 500.0 == counted_scan(1000003)
+
+
+def test_composite_cofactor_adds_rho_steps():
+    n = 1000000007 * 1000000009
+    work = auto.features(n)
+    assert work["divisors"] == 2048 + auto.RHO_STEP_CANDIDATES * work["rho"]
+
+
+def test_smooth_number_is_cheap_for_divisors():
+    assert auto.features(2**55)["divisors"] == 1.0
+
+
+def test_ties_prefer_fewer_workers_then_rho_over_divisors():
+    model = auto.CostModel([])
+    model.predict = lambda work, algorithm, backend, workers: 1.0
+    ranking = model.rank(2**55, 2, ["thread"])
+    assert ranking[0][1:] == ("trial", "thread", 1)
+    assert [c[1] for c in ranking if c[3] == 1] == ["trial", "rho", "divisors"]
+
+
+def test_oversubscribe_only_for_open_mpi(monkeypatch):
+    workers = (auto.os.cpu_count() or 1) + 1
+    monkeypatch.setattr(auto.backends, "mpi_launcher", lambda: "openmpi")
+    assert "--oversubscribe" in auto.command_for(15, "rho", "mpi", workers)
+    monkeypatch.setattr(auto.backends, "mpi_launcher", lambda: "mpich")
+    assert "--oversubscribe" not in auto.command_for(15, "rho", "mpi", workers)
@@ -0,0 +1,28 @@
+import json
+
+import batch
+
+
+def test_check_token():
+    assert batch.check_token("12") == 12
+    assert "error" in batch.check_token("abc")
+    assert "error" in batch.check_token("-7")
+
+
+def test_bad_tokens_and_failures_become_records(tmp_path):
+    from mpi4py import MPI
+
+    def solve(comm, number):
+        if number == 13:
+            raise RuntimeError("boom")
+        return {"number": number}
+
+    source = tmp_path / "in.txt"
+    source.write_text("12 abc -7 # comment\n13 14\n")
+    output = tmp_path / "out.jsonl"
+    batch.run(MPI.COMM_WORLD, solve, str(source), str(output), batch_size=2)
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert {r["number"]: "error" in r for r in records} == {
+        12: False, "abc": True, -7: True, 13: True, 14: False
+    }
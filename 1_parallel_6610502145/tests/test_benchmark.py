@@ -0,0 +1,21 @@
+import benchmark
+
+
+def test_open_mpi_gets_oversubscribe_flags():
+    args = benchmark.placement_args(4, "core", None, 2, launcher="openmpi")
+    assert args == ["--oversubscribe", "--bind-to", "core:overload-allowed"]
+
+
+def test_mpich_gets_no_open_mpi_only_flags():
+    args = benchmark.placement_args(4, "core", "socket", 2, launcher="mpich")
+    assert args == ["--map-by", "socket", "--bind-to", "core"]
+
+
+def test_no_flags_within_cpu_count():
+    assert benchmark.placement_args(2, None, None, 4, launcher="openmpi") == []
+
+
+def test_build_command_leaves_cache_to_the_caller():
+    command = benchmark.build_command("thread", 2, 100, ["--algorithm", "rho"])
+    assert "--no-cache" not in command
+    assert command[-2:] == ["--algorithm", "rho"]
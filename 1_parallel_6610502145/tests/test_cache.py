@@ -0,0 +1,64 @@
+import json
+
+import cache
+
+PSP = 318665857834031151167461  # = 399165290221 * 798330580441
+
+
+def test_hit_and_miss(tmp_path):
+    store = cache.FactorCache(tmp_path / "c.sqlite")
+    assert store.get(1099511627776) is None
+    store.put(1099511627776, {2: 40})
+    assert store.get(1099511627776) == {2: 40}
+
+
+def test_resolve_from_cached_primes(tmp_path):
+    store = cache.FactorCache(tmp_path / "c.sqlite")
+    store.put(1099511627776, {2: 40})
+    # 2 is cached and the cofactor 1000003 is prime
+    assert store.resolve(2**3 * 1000003) == {2: 3, 1000003: 1}
+    # now stored in its own right
+    assert store.get(2**3 * 1000003) == {2: 3, 1000003: 1}
+    # no cached prime divides it
+    assert store.resolve(3 * 5) is None
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    store = cache.FactorCache(tmp_path / "c.sqlite", max_entries=2)
+    store.put(4, {2: 2})
+    store.put(9, {3: 2})
+    assert store.get(4) == {2: 2}  # 4 is now more recent than 9
+    store.put(25, {5: 2})
+    assert store.get(9) is None
+    assert store.get(4) == {2: 2}
+    assert store.get(25) == {5: 2}
+
+
+def test_entries_that_no_longer_verify_are_invalidated(tmp_path):
+    store = cache.FactorCache(tmp_path / "c.sqlite")
+    # what a cache written before Miller-Rabin base 41 could hold
+    with store.db:
+        store.db.execute(
+            "INSERT INTO factorizations VALUES (?, ?, 0)", (str(PSP), json.dumps([[PSP, 1]]))
+        )
+        store.db.execute("INSERT INTO primes VALUES (?, 0)", (str(PSP),))
+    assert store.get(PSP) is None
+    assert store.db.execute("SELECT COUNT(*) FROM factorizations").fetchone() == (0,)
+    assert store.db.execute("SELECT COUNT(*) FROM primes").fetchone() == (0,)
+
+    # a composite in the primes table is dropped, not used to split
+    with store.db:
+        store.db.execute("INSERT INTO primes VALUES (?, 0)", (str(PSP),))
+    assert store.resolve(7 * PSP) is None
+    assert store.db.execute("SELECT COUNT(*) FROM primes").fetchone() == (0,)
+
+    store.put(12, {2: 2, 3: 1})
+    store.db.execute("UPDATE factorizations SET factors = ? WHERE number = '12'", ('[[2, 3]]',))
+    assert store.get(12) is None
+
+
+def test_explicit_invalidate(tmp_path):
+    store = cache.FactorCache(tmp_path / "c.sqlite")
+    store.put(12, {2: 2, 3: 1})
+    store.invalidate(12)
+    assert store.get(12) is None
@@ -0,0 +1,40 @@
+SNIPPET = """
+import numpy as np
+from mpi4py import MPI
+import collect
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+# ordered: disjoint ascending ranges in rank order (the static split)
+ordered = np.arange(rank * 10, rank * 10 + rank + 1, dtype=np.int64)
+# unordered: each rank sorted on its own, interleaved across ranks (dynamic)
+unordered = np.arange(rank, 40, comm.Get_size(), dtype=np.int64)
+empty = np.zeros(0, dtype=np.int64)
+wide = np.array([2**70 + rank], dtype=object)
+
+result = {}
+for method in collect.METHODS:
+    for label, local, is_ordered in (
+        ("ordered", ordered, True), ("unordered", unordered, False), ("empty", empty, True)
+    ):
+        gathered = collect.gather_factors(comm, local, method, ordered=is_ordered)
+        result[f"{method}/{label}"] = None if gathered is None else [int(v) for v in gathered]
+    gathered = collect.gather_factors(comm, wide, method, wide=True)
+    result[f"{method}/wide"] = None if gathered is None else [int(v) for v in gathered]
+"""
+
+
+def test_tree_gatherv_and_pickle_agree(run_mpi):
+    # 5 ranks: the binomial tree has an unpaired rank at one level
+    ranks = run_mpi(5, SNIPPET)
+    expected = {
+        "ordered": [r * 10 + i for r in range(5) for i in range(r + 1)],
+        "unordered": list(range(40)),
+        "empty": [],
+        "wide": [2**70 + r for r in range(5)],
+    }
+    for method in ("gatherv", "tree", "pickle"):
+        for label, values in expected.items():
+            assert ranks[0][f"{method}/{label}"] == values, (method, label)
+            # only rank 0 gets the result
+            assert all(rank[f"{method}/{label}"] is None for rank in ranks[1:])
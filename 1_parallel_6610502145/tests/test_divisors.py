@@ -0,0 +1,30 @@
+import random
+
+import divisors
+import rho
+
+
+def test_factorize_matches_trial_division():
+    rng = random.Random(0)
+    for n in [0, 1, 2, 4097, 4099 * 4099, 2**55] + [rng.randrange(2, 10**7) for _ in range(200)]:
+        assert divisors.factorize(n) == divisors.trial_factorize(n)
+
+
+def test_semiprime_cofactor_is_split_by_rho():
+    calls = []
+
+    def split(m):
+        calls.append(m)
+        return rho.pollard_brent(m)
+
+    n = 1000000007 * 1000000009
+    assert divisors.factorize(12 * n, split=split) == {2: 2, 3: 1, 1000000007: 1, 1000000009: 1}
+    assert calls == [n]
+
+
+def test_prime_cofactor_is_not_split():
+    assert divisors.factorize(2**61 - 1, split=None) == {2**61 - 1: 1}
+
+
+def test_divisors_from_factorization():
+    assert divisors.divisors_from_factorization({2: 2, 5: 2}) == [1, 2, 4, 5, 10, 20, 25, 50, 100]
@@ -0,0 +1,21 @@
+import pytest
+
+import factorlib
+
+
+def test_factorize_structured_result():
+    result = factorlib.factorize(1099511627776, algorithm="divisors", workers=2)
+    assert result["prime_factors"] == {2: 40}
+    assert result["divisors"][:3] == [1, 2, 4]
+    assert result["workers"] == 2
+
+
+@pytest.mark.parametrize("workers", [0, -1])
+def test_explicit_nonpositive_workers_is_rejected(workers):
+    with pytest.raises(ValueError):
+        factorlib.factorize(100, workers=workers)
+
+
+def test_unknown_option_is_rejected():
+    with pytest.raises(TypeError):
+        factorlib.factorize(100, colour="blue")
@@ -0,0 +1,64 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import history
+
+HISTORY_PY = Path(__file__).resolve().parent.parent / "history.py"
+
+
+def store(path, commit, samples):
+    result = {"num_processes": 2, "time_seconds": float(np.median(samples)), "samples": samples}
+    history.record(path, [result], "mpi", "min", "loop_static", commit=commit)
+
+
+def run_compare(path, *extra):
+    return subprocess.run(
+        [sys.executable, str(HISTORY_PY), "--db", str(path), "compare", *extra],
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_exact_pvalue_of_fully_separated_samples():
+    # 3 + 3: the observed split is 1 of C(6, 3) = 20
+    assert history.permutation_pvalue([1.0, 1.03, 0.98], [2.01, 1.97, 2.05]) == 1 / 20
+    assert history.permutation_pvalue([1.0, 1.03, 0.98, 1.01], [2.0, 1.9, 2.1, 2.05]) == 1 / 70
+
+
+def test_false_positive_rate_stays_below_alpha():
+    # both sides from one distribution: --alpha bounds how often it flags
+    rng = np.random.default_rng(1)
+    p_values = np.array(
+        [history.permutation_pvalue(rng.lognormal(size=5), rng.lognormal(size=5)) for _ in range(1000)]
+    )
+    for alpha in (0.05, 0.01):
+        assert (p_values < alpha).mean() <= alpha + 3 * np.sqrt(alpha / 1000)
+
+
+def test_clear_2x_slowdown_with_default_repeats_exits_1(tmp_path):
+    db = tmp_path / "history.sqlite"
+    store(db, "aaaa", [1.00, 1.03, 0.98, 1.01][: history.MIN_SAMPLES])
+    store(db, "bbbb", [2.01, 1.97, 2.05, 2.02][: history.MIN_SAMPLES])
+    completed = run_compare(db)
+    assert completed.returncode == 1, completed.stdout
+    assert "REGRESSION" in completed.stdout
+
+
+def test_noise_is_not_flagged(tmp_path):
+    db = tmp_path / "history.sqlite"
+    store(db, "aaaa", [1.00, 1.03, 0.98, 1.02])
+    store(db, "bbbb", [1.01, 0.99, 1.04, 1.00])
+    assert run_compare(db).returncode == 0
+
+
+def test_too_few_samples_are_not_flagged_but_warned(tmp_path):
+    db = tmp_path / "history.sqlite"
+    store(db, "aaaa", [1.00, 1.03, 0.98])
+    store(db, "bbbb", [2.01, 1.97, 2.05])
+    completed = run_compare(db)
+    assert completed.returncode == 0
+    assert "p=n/a" in completed.stdout
+    assert "Warning" in completed.stderr
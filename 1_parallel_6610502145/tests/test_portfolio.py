@@ -0,0 +1,65 @@
+import parallel
+import portfolio
+
+# close factors: Fermat splits it on its first try, trial division needs ~15k blocks
+CLOSE = 1000000007 * 1000000009
+# p - 1 = 2 * 500000003 and q - 1 = 2 * 83 * 6024097: p-1 gives up on both
+NOT_SMOOTH = 1000000007 * 1000000103
+
+SNIPPET = """
+from mpi4py import MPI
+import parallel, portfolio
+
+comm = MPI.COMM_WORLD
+blocks = []
+
+def kernel(n, lo, hi, memory_mb):
+    blocks.append(lo)
+    return parallel.factor_vectorized(n, lo, hi, memory_mb)
+
+factor, strategy, _ = portfolio.race(comm, NUMBER, ["fermat", "trial"], kernel, 64)
+result = {"factor": factor, "strategy": strategy, "blocks": len(blocks)}
+"""
+
+
+def counting_kernel(calls):
+    def kernel(n, lo, hi, memory_mb):
+        calls.append(lo)
+        return parallel.factor_vectorized(n, lo, hi, memory_mb)
+
+    return kernel
+
+
+def test_first_finisher_wins_and_the_rest_are_cancelled():
+    calls = []
+    factor, strategy, seconds = portfolio.race(None, CLOSE, ["trial", "fermat"], counting_kernel(calls), 64)
+    assert strategy == "fermat"
+    assert factor in (1000000007, 1000000009)
+    assert seconds >= 0
+    # trial ran one batch per round before fermat finished, then was closed
+    assert len(calls) <= 2
+
+
+def test_ranks_agree_on_the_winner(run_mpi):
+    ranks = run_mpi(2, SNIPPET.replace("NUMBER", str(CLOSE)))
+    answers = {(r["factor"], r["strategy"]) for r in ranks}
+    assert len(answers) == 1
+    factor, strategy = answers.pop()
+    assert strategy == "fermat" and CLOSE % factor == 0
+    # rank 1 ran trial division and stopped once it heard of fermat's find
+    assert ranks[1]["blocks"] < 1000
+
+
+def test_fallback_when_every_strategy_gives_up():
+    factor, strategy, _ = portfolio.race(None, NOT_SMOOTH, ["pm1"], parallel.factor_vectorized, 64)
+    assert strategy == "rho (fallback)"
+    assert factor in (1000000007, 1000000103)
+
+
+def test_factorize_records_one_win_per_split():
+    n = 2**3 * CLOSE
+    factors, wins = portfolio.factorize(None, n, ["fermat", "pm1"], parallel.factor_vectorized, 64)
+    assert factors == {2: 3, 1000000007: 1, 1000000009: 1}
+    assert [w["cofactor"] for w in wins] == [CLOSE]
+    assert CLOSE % wins[0]["factor"] == 0
+    assert "by" in portfolio.format_wins(wins)
@@ -0,0 +1,16 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import primes
+
+
+def test_concurrent_ensure_table_builds_one_complete_table(tmp_path):
+    # batch-mode ranks each call ensure_table on their own communicator
+    path = tmp_path / "table.npy"
+    with ProcessPoolExecutor(4) as pool:
+        paths = list(pool.map(primes.ensure_table, [1 << 20] * 8, [path] * 8))
+    assert set(paths) == {path}
+    table = primes.load_table(path)
+    assert np.array_equal(table, primes.simple_sieve(1 << 20))
+    assert not list(tmp_path.glob("*.tmp"))
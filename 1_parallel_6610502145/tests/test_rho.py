@@ -0,0 +1,13 @@
+import rho
+
+# strong pseudoprime to every base 2..37 (the first one); base 41 exposes it
+PSP_2_TO_37 = 318665857834031151167461
+
+
+def test_strong_pseudoprime_to_bases_up_to_37_is_composite():
+    assert PSP_2_TO_37 == 399165290221 * 798330580441
+    assert not rho.is_prime(PSP_2_TO_37)
+
+
+def test_factorize_strong_pseudoprime():
+    assert rho.factorize(PSP_2_TO_37) == {399165290221: 1, 798330580441: 1}
@@ -0,0 +1,43 @@
+import numpy as np
+
+import parallel
+import scheduler
+
+SNIPPET = """
+import numpy as np
+from mpi4py import MPI
+import parallel, scheduler
+
+comm = MPI.COMM_WORLD
+chunks = []
+
+def kernel(number, lo, hi, memory_mb):
+    chunks.append([lo, hi])
+    return parallel.factor_vectorized(number, lo, hi, memory_mb)
+
+local, stats = scheduler.dynamic_factor(comm, kernel, NUMBER, 2, END, 64)
+result = {"chunks": chunks, "factors": local.tolist(), "stats": stats}
+"""
+
+
+def test_chunk_size_bounds():
+    assert scheduler.next_chunk_size(None, 10**9, 4) == scheduler.MIN_CHUNK
+    assert scheduler.next_chunk_size(1e12, 10**12, 4) == scheduler.MAX_CHUNK
+    # never more than a fair share of what is left
+    assert scheduler.next_chunk_size(1e9, 1 << 20, 4) == 1 << 17
+
+
+def test_dynamic_schedule_covers_the_range_exactly_once(run_mpi):
+    number, end = 1099511627776, 1048577
+    ranks = run_mpi(3, SNIPPET.replace("NUMBER", str(number)).replace("END", str(end)))
+
+    # rank 0 only coordinates; the workers' chunks tile [2, end) without gaps or overlaps
+    assert ranks[0]["chunks"] == []
+    chunks = sorted(chunk for rank in ranks for chunk in rank["chunks"])
+    assert chunks[0][0] == 2 and chunks[-1][1] == end
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    assert ranks[0]["stats"]["chunks"] == len(chunks)
+
+    factors = sorted(f for rank in ranks for f in rank["factors"])
+    assert factors == parallel.factor_vectorized(number, 2, end).tolist()
+    assert np.all(np.diff(factors) > 0)
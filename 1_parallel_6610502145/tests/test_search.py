@@ -0,0 +1,49 @@
+from math import isqrt
+
+SNIPPET = """
+from math import isqrt
+from mpi4py import MPI
+import parallel, search
+
+comm = MPI.COMM_WORLD
+BLOCK = 1 << 12
+result = {}
+for number in NUMBERS:
+    scanned = []
+
+    def kernel(n, lo, hi, memory_mb):
+        scanned.append((lo - 2) // BLOCK)
+        return parallel.factor_vectorized(n, lo, hi, memory_mb)
+
+    factor, _, _ = search.smallest_factor(comm, kernel, number, 2, isqrt(number) + 1, 64, BLOCK)
+    result[str(number)] = {"factor": factor, "blocks": scanned}
+"""
+
+BLOCK = 1 << 12
+# smallest factor deep in the range, far from it, and none at all
+DEEP = 1000003 * 1000000000039
+EARLY = 3 * 1000000000000000003
+PRIME = 1000000007
+
+
+def test_smallest_factor_agrees_on_every_rank_and_stops_early(run_mpi):
+    ranks = run_mpi(3, SNIPPET.replace("NUMBERS", str([DEEP, EARLY, PRIME])))
+
+    for rank in ranks:
+        assert rank[str(DEEP)]["factor"] == 1000003
+        assert rank[str(EARLY)]["factor"] == 3
+        assert rank[str(PRIME)]["factor"] is None
+
+    # every block below the winner was scanned, and the ~7.7M blocks past it were
+    # cancelled (how far a rank got before hearing of it depends on scheduling)
+    winner = (1000003 - 2) // BLOCK
+    blocks = sorted(b for rank in ranks for b in rank[str(DEEP)]["blocks"])
+    assert set(range(winner + 1)) <= set(blocks)
+    assert max(blocks) < 100 * winner
+
+    # factor 3 lies in block 0 of about 2^18
+    assert sum(len(rank[str(EARLY)]["blocks"]) for rank in ranks) < 2**18 // 100
+
+    # without a factor every block is scanned once
+    prime_blocks = sorted(b for rank in ranks for b in rank[str(PRIME)]["blocks"])
+    assert prime_blocks == list(range(-(-(isqrt(PRIME) - 1) // BLOCK)))
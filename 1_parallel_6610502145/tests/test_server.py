@@ -0,0 +1,47 @@
+import parallel
+import server
+
+DEFAULTS = parallel.build_parser().parse_args(["0"])
+
+
+def error_for(request):
+    return server._validate(request, parallel.CHOICES, DEFAULTS)
+
+
+def test_valid_request():
+    assert error_for({"number": 34343434, "algorithm": "rho", "memory_mb": 8}) is None
+    assert error_for({"number": 34343434, "collect": "tree"}) is None
+
+
+def test_collect_override_is_honored():
+    args = server._request_args(DEFAULTS, {"number": 12, "collect": "tree"})
+    assert args.collect == "tree"
+
+
+def test_options_fixed_at_startup_are_rejected():
+    assert "backend" in error_for({"number": 12, "backend": "thread"})
+    assert "workers" in error_for({"number": 12, "workers": 4})
+
+
+def test_rejects_bad_numbers():
+    assert error_for({"number": -7})
+    assert error_for({"number": True})
+    assert error_for({"number": "12"})
+
+
+def test_rejects_bad_options():
+    assert error_for({"number": 12, "memory_mb": "64"})
+    assert error_for({"number": 12, "memory_mb": 0})
+    assert error_for({"number": 12, "no_cache": 1})
+    assert error_for({"number": 12, "algorithm": "rho", "mode": "smallest"})
+
+
+def test_failing_solve_becomes_an_error():
+    from mpi4py import MPI
+
+    def solve(comm, number, args):
+        raise ValueError("boom")
+
+    result, error = server._solve(MPI.COMM_SELF, solve, 12, DEFAULTS)
+    assert result is None
+    assert error == "ValueError: boom"
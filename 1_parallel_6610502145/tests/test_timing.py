@@ -0,0 +1,61 @@
+import time
+
+import timing
+
+SNIPPET = """
+import time
+from mpi4py import MPI
+import timing
+
+comm = MPI.COMM_WORLD
+timing.enable(comm, startup=0.5)
+with timing.phase("compute"):
+    time.sleep(0.05 * (comm.Get_rank() + 1))
+with timing.phase("communication"):
+    comm.allgather(comm.Get_rank())
+result = timing.report()
+timing.disable()
+"""
+
+
+def test_disabled_records_nothing():
+    timing.disable()
+    before = timing.report()
+    with timing.phase("compute"):
+        time.sleep(0.01)
+    assert timing.report() == before
+
+
+def test_phases_accumulate_in_process():
+    timing.enable(startup=0.25)
+    try:
+        for _ in range(2):
+            with timing.phase("compute"):
+                time.sleep(0.01)
+        data = timing.report()
+    finally:
+        timing.disable()
+    assert data["ranks"] == 1
+    assert data["phases"]["startup"] == [0.25]
+    assert data["phases"]["compute"][0] >= 0.02
+    assert data["phases"]["output"] == [0.0]
+
+
+def test_report_gathers_every_rank_on_rank_0(run_mpi):
+    ranks = run_mpi(2, SNIPPET)
+    assert ranks[1] is None
+    data = ranks[0]
+    assert data["ranks"] == 2
+    compute = data["phases"]["compute"]
+    # each rank's own busy time: the barrier before a phase keeps waiting out of it
+    assert 0.05 <= compute[0] < compute[1]
+    assert compute[1] >= 0.1
+    assert data["phases"]["startup"] == [0.5, 0.5]
+
+
+def test_summarize_imbalance():
+    row = timing.summarize(
+        {"ranks": 2, "phases": {name: [1.0, 3.0] for name in timing.PHASES}}
+    )
+    assert row["compute_min"] == 1.0 and row["compute_max"] == 3.0
+    assert row["imbalance"] == 1.5
@@ -0,0 +1,93 @@
+"""
+Per-rank phase timing for `parallel.py --timing`.
+
+Phases:
+  startup        interpreter start of parallel.py through imports and MPI init
+  compute        kernels and factorization work
+  communication  cache broadcast and collecting the factors on rank 0
+  output         formatting and printing the result (rank 0 only)
+
+Every phase after startup begins with a Barrier, so a rank's figure is its own
+busy time and waiting for slower ranks shows up as imbalance, not as time spent
+in the next phase. Disabled (the default) it is a no-op: no barriers, no clock.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+PHASES = ("startup", "compute", "communication", "output")
+
+_state = {"enabled": False, "comm": None, "clock": time.perf_counter}
+_seconds = dict.fromkeys(PHASES, 0.0)
+
+
+def enable(comm=None, startup=0.0):
+    """Start recording; `startup` is the seconds already spent before this call"""
+    _state["enabled"] = True
+    _state["comm"] = comm
+    if comm is not None:
+        from mpi4py import MPI
+
+        _state["clock"] = MPI.Wtime
+    _seconds.update(dict.fromkeys(PHASES, 0.0))
+    _seconds["startup"] = startup
+
+
+def disable():
+    """Back to the no-op default (factorlib enables timing for one call at a time)"""
+    _state.update(enabled=False, comm=None, clock=time.perf_counter)
+
+
+@contextmanager
+def phase(name):
+    if not _state["enabled"]:
+        yield
+        return
+    if _state["comm"] is not None:
+        _state["comm"].Barrier()
+    clock = _state["clock"]
+    start = clock()
+    try:
+        yield
+    finally:
+        _seconds[name] += clock() - start
+
+
+def report():
+    """{"ranks": P, "phases": {phase: [seconds per rank]}} on rank 0, None elsewhere"""
+    comm = _state["comm"]
+    local = [_seconds[name] for name in PHASES]
+    if comm is None:
+        per_rank = [local]
+    else:
+        per_rank = comm.gather(local, root=0)
+        if comm.Get_rank() != 0:
+            return None
+    return {
+        "ranks": len(per_rank),
+        "phases": {name: [row[i] for row in per_rank] for i, name in enumerate(PHASES)},
+    }
+
+
+def write_report(data, path):
+    """Write report() as one JSON line to `path`, or to stdout for '-'"""
+    text = json.dumps(data)
+    if path == "-":
+        print(text)
+    else:
+        with open(path, "w", encoding="utf-8") as out:
+            out.write(text + "\n")
+
+
+def summarize(data):
+    """min/max/mean per phase plus the compute imbalance ratio (max / mean), flat for a CSV row"""
+    row = {}
+    for name in PHASES:
+        values = data["phases"][name]
+        row[f"{name}_min"] = min(values)
+        row[f"{name}_max"] = max(values)
+        row[f"{name}_mean"] = sum(values) / len(values)
+    mean = row["compute_mean"]
+    row["imbalance"] = row["compute_max"] / mean if mean else 1.0
+    return row